@@ -0,0 +1,42 @@
+"""
+使用 mypyc 将纯函数模块编译为 C 扩展
+
+功能:
+1. 将 NATIVE_MODULES 中的模块编译为与源文件同目录的 .so 扩展
+2. Python 导入时会优先加载扩展模块，未编译时自动回退到 .py 源码
+
+用法:
+    uv sync --group native
+    uv run python build_native.py
+
+注意: 修改被编译模块的源码后需要重新运行本脚本，或删除旧的 .so 文件
+"""
+
+from mypyc.build import mypycify
+from setuptools import setup
+
+# 需要编译的模块（必须是完整类型标注、无插件运行时依赖的纯函数模块）
+NATIVE_MODULES = [
+    "src/plugins/fund/market_rules.py",
+]
+
+MYPYC_OPTIONS = [
+    # 按仓库根目录推导模块名（src.plugins.fund.market_rules）
+    "--explicit-package-bases",
+    # 只编译指定模块，不检查其所在插件包的其它代码
+    "--follow-imports=silent",
+]
+
+
+def main():
+    setup(
+        name="kiana-native",
+        py_modules=[],
+        package_dir={"": "."},
+        ext_modules=mypycify([*MYPYC_OPTIONS, *NATIVE_MODULES], opt_level="3"),
+        script_args=["build_ext", "--inplace"],
+    )
+
+
+if __name__ == "__main__":
+    main()
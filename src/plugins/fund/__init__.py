@@ -7,15 +7,23 @@ from typing import Any, Literal
 
 import akshare as ak
 import pandas as pd
-from nonebot import get_plugin_config, logger, on_regex
+from nonebot import get_driver, logger, on_message
 from nonebot.adapters.onebot.v11 import Bot, Event, GroupMessageEvent, MessageEvent, MessageSegment
+from nonebot.compat import model_dump
+from nonebot.consts import REGEX_MATCHED
 from nonebot.exception import MatcherException
 from nonebot.plugin import PluginMetadata
+from nonebot.rule import Rule
+from nonebot.typing import T_State
+from pydantic import TypeAdapter
 
 from ..group_permission import create_group_rule
 from .cache import FundDataCacheManager
 from .config import Config
 from .market_rules import (
+    MarketError,
+    classify_code,
+    format_market_error,
     infer_stock_market,
     is_beijing_stock,
     is_etf,
@@ -42,11 +50,16 @@ __plugin_meta__ = PluginMetadata(
 )
 
 
+_CONFIG_ADAPTER = TypeAdapter(Config)
+
+
 # 延迟加载插件配置（避免在模块导入时初始化）
 def _get_plugin_config() -> Config:
     """获取插件配置，使用缓存避免重复获取"""
     if not hasattr(_get_plugin_config, "_cached_config"):
-        _get_plugin_config._cached_config = get_plugin_config(Config)
+        _get_plugin_config._cached_config = _CONFIG_ADAPTER.validate_python(
+            model_dump(get_driver().config)
+        )
     return _get_plugin_config._cached_config
 
 
@@ -114,21 +127,23 @@ def _identify_with_exchange_suffix(code: str, pure_code: str, exchange: str) ->
     return CodeType.STOCK
 
 
+# classify_code 类别 -> 纯6位代码的类型（纯6位股票代码需带后缀，视为未知）
+_SIX_DIGIT_CATEGORY_TYPES: dict[str, CodeType] = {
+    "index": CodeType.INDEX,
+    "etf": CodeType.ETF,
+    "lof": CodeType.LOF,
+    "off": CodeType.OFF_MARKET_FUND,
+}
+
+
 def _identify_six_digit_code(code: str) -> CodeType:
     """识别6位数字代码类型"""
-    # 按优先级检查：指数 > ETF > LOF > 场外基金
-    type_checkers = [
-        (is_index, CodeType.INDEX),
-        (is_etf, CodeType.ETF),
-        (is_lof, CodeType.LOF),
-        (is_off_market_fund, CodeType.OFF_MARKET_FUND),
-    ]
+    # 优先级：指数 > ETF > LOF > 场外基金，由 classify_code 一次查表完成
+    return _SIX_DIGIT_CATEGORY_TYPES.get(classify_code(code), CodeType.UNKNOWN)
 
-    for checker_func, code_type in type_checkers:
-        if checker_func(code):
-            return code_type
 
-    return CodeType.UNKNOWN
+# 支持的交易所后缀
+_EXCHANGE_SUFFIXES = frozenset({"SZ", "SH", "BJ"})
 
 
 def identify_code_type(code: str) -> CodeType:
@@ -153,28 +168,50 @@ def identify_code_type(code: str) -> CodeType:
     # 移除可能的空格
     code = code.strip().upper()
 
-    # 带交易所后缀的格式 (如 000001.SZ, 600000.SH, 43123456.BJ)
-    if re.match(r"^\d{6,8}\.(SZ|SH|BJ)$", code):
-        pure_code, exchange = code.split(".")
-        return _identify_with_exchange_suffix(code, pure_code, exchange)
+    # 按 "." 切分一次，纯数字部分用 isascii + isdigit 判定（等价于 ASCII 的 \d），不走正则
+    pure_code, sep, exchange = code.partition(".")
+    if not (pure_code.isascii() and pure_code.isdigit()):
+        return CodeType.UNKNOWN
 
-    # 纯8位数字可能是北交所股票（但需要后缀确认）
-    if re.match(r"^\d{8}$", code):
+    # 带交易所后缀的格式 (如 000001.SZ, 600000.SH, 43123456.BJ)
+    if sep:
+        if exchange in _EXCHANGE_SUFFIXES and 6 <= len(pure_code) <= 8:
+            return _identify_with_exchange_suffix(code, pure_code, exchange)
         return CodeType.UNKNOWN
 
     # 纯6位数字 - 按优先级判断类型
-    if re.match(r"^\d{6}$", code):
+    if len(pure_code) == 6:
         return _identify_six_digit_code(code)
 
-    # 未知格式
+    # 纯8位数字可能是北交所股票（但需要后缀确认），其余长度均为未知格式
     return CodeType.UNKNOWN
 
 
-fund_query = on_regex(
-    r"^(\d{6}|\d{6}\.(SZ|SH)|\d{8}\.BJ)$",
-    rule=fund_group_rule,
-    flags=re.IGNORECASE,
-)
+# 查询代码格式：纯6位数字、6位 + .SZ/.SH、8位 + .BJ（模块导入时编译一次）
+FUND_CODE_RE = re.compile(r"^(\d{6}|\d{6}\.(SZ|SH)|\d{8}\.BJ)$", re.IGNORECASE)
+
+
+async def _is_fund_code_message(event: Event, state: T_State) -> bool:
+    """检查消息是否为查询代码，直接复用预编译的 FUND_CODE_RE
+
+    Args:
+        event: 事件对象
+        state: 事件处理状态
+
+    Returns:
+        是否匹配查询代码格式
+    """
+    try:
+        msg = event.get_message()
+    except Exception:
+        return False
+    if matched := FUND_CODE_RE.search(str(msg)):
+        state[REGEX_MATCHED] = matched
+        return True
+    return False
+
+
+fund_query = on_message(rule=Rule(_is_fund_code_message) & fund_group_rule)
 
 
 def _normalize_etf_data_from_ths(df: pd.DataFrame) -> pd.DataFrame:
@@ -439,8 +476,9 @@ async def get_stock_data(stock_code: str) -> dict:
             market = infer_stock_market(code)
 
         # 验证市场和代码的匹配性
-        is_valid, error_msg = validate_market_code(code, market)
-        if not is_valid:
+        market_error = validate_market_code(code, market)
+        if market_error != MarketError.OK:
+            error_msg = format_market_error(market_error, code, market)
             logger.warning(error_msg)
             return {"success": False, "error": error_msg}
 
@@ -657,6 +695,23 @@ def _build_index_info_header(
     return info_lines
 
 
+def _column_values(df: pd.DataFrame, column: str, default: Any, length: int) -> list[Any]:
+    """整列取出为 Python 列表，列不存在时用默认值填充
+
+    Args:
+        df: 数据表
+        column: 列名
+        default: 列不存在时的填充值
+        length: 列不存在时的填充长度
+
+    Returns:
+        列值列表
+    """
+    if column in df.columns:
+        return df[column].tolist()
+    return [default] * length
+
+
 def _add_recent_changes(info_lines: list[str], hist_df: pd.DataFrame) -> None:
     """添加最近交易日涨跌幅信息
 
@@ -665,16 +720,20 @@ def _add_recent_changes(info_lines: list[str], hist_df: pd.DataFrame) -> None:
         hist_df: 历史数据
     """
     display_days = _get_config_value("fund_display_recent_days", DEFAULT_DISPLAY_RECENT_DAYS)
-    recent_hist = hist_df.tail(display_days).iloc[::-1]
+    recent_hist = hist_df.tail(display_days)
+    count = len(recent_hist)
+    dates = _column_values(recent_hist, "date", "", count)
+    closes = _column_values(recent_hist, "close", 0, count)
 
-    for i, (_, row) in enumerate(recent_hist.iterrows()):
+    # 按时间倒序输出，前一交易日即列表中的前一个元素
+    for i in reversed(range(count)):
         try:
-            date_str = row.get("date", "")
-            close_price = float(row.get("close", 0))
+            date_str = dates[i]
+            close_price = float(closes[i])
 
             # 计算当日涨跌幅
-            if i < len(recent_hist) - 1:
-                prev_close = float(recent_hist.iloc[i + 1].get("close", 0))
+            if i > 0:
+                prev_close = float(closes[i - 1])
                 daily_change = (
                     (close_price - prev_close) / prev_close * 100 if prev_close != 0 else 0
                 )
@@ -687,6 +746,39 @@ def _add_recent_changes(info_lines: list[str], hist_df: pd.DataFrame) -> None:
             continue
 
 
+def _add_recent_daily_changes(
+    info_lines: list[str], hist_df: pd.DataFrame, price_digits: int
+) -> None:
+    """添加最近交易日涨跌幅信息（使用数据源自带的 涨跌幅/收盘 列）
+
+    整列取出为 Python 列表后用 reversed() 倒序遍历，不复制 DataFrame 也不逐行 iterrows。
+
+    Args:
+        info_lines: 信息行列表（就地修改）
+        hist_df: 历史数据
+        price_digits: 收盘价保留的小数位数
+    """
+    display_days = _get_config_value("fund_display_recent_days", DEFAULT_DISPLAY_RECENT_DAYS)
+    recent_hist = hist_df.tail(display_days)
+    count = len(recent_hist)
+    dates = _column_values(recent_hist, "日期", "", count)
+    changes = _column_values(recent_hist, "涨跌幅", 0, count)
+    closes = _column_values(recent_hist, "收盘", 0, count)
+
+    for date_str, raw_change, raw_close in zip(
+        reversed(dates), reversed(changes), reversed(closes), strict=True
+    ):
+        try:
+            daily_change = float(raw_change)
+            close_price = float(raw_close)
+        except (ValueError, TypeError):
+            continue
+        change_sign = "+" if daily_change > 0 else ""
+        info_lines.append(
+            f"{date_str}: {change_sign}{daily_change:.2f}% ({close_price:.{price_digits}f})"
+        )
+
+
 def format_index_info(index_code: str, index_data: dict) -> str:
     """格式化指数信息文本
 
@@ -786,20 +878,7 @@ async def format_stock_info(stock_code: str, stock_data: dict) -> str:
         )
 
         # 添加最近交易日的涨跌幅
-        display_days = _get_config_value("fund_display_recent_days", DEFAULT_DISPLAY_RECENT_DAYS)
-        recent_hist = hist_df.tail(display_days).iloc[::-1]
-        for _, row in recent_hist.iterrows():
-            try:
-                date_str = row.get("日期", "")
-                daily_change = float(row.get("涨跌幅", 0))
-                close_price = float(row.get("收盘", 0))
-
-                if daily_change > 0:
-                    info_lines.append(f"{date_str}: +{daily_change:.2f}% ({close_price:.2f})")
-                else:
-                    info_lines.append(f"{date_str}: {daily_change:.2f}% ({close_price:.2f})")
-            except (ValueError, TypeError):
-                continue
+        _add_recent_daily_changes(info_lines, hist_df, price_digits=2)
 
         return "\n".join(info_lines)
 
@@ -859,20 +938,7 @@ def format_etf_info(fund_code: str, etf_data: dict) -> str:
         )
 
         # 添加最近交易日的涨跌幅
-        display_days = _get_config_value("fund_display_recent_days", DEFAULT_DISPLAY_RECENT_DAYS)
-        recent_hist = hist_df.tail(display_days).iloc[::-1]
-        for _, row in recent_hist.iterrows():
-            try:
-                date_str = row.get("日期", "")
-                daily_change = float(row.get("涨跌幅", 0))
-                close_price = float(row.get("收盘", 0))
-
-                if daily_change > 0:
-                    info_lines.append(f"{date_str}: +{daily_change:.2f}% ({close_price:.3f})")
-                else:
-                    info_lines.append(f"{date_str}: {daily_change:.2f}% ({close_price:.3f})")
-            except (ValueError, TypeError):
-                continue
+        _add_recent_daily_changes(info_lines, hist_df, price_digits=3)
 
         return "\n".join(info_lines)
 
@@ -881,6 +947,10 @@ def format_etf_info(fund_code: str, etf_data: dict) -> str:
         return f"基金 {fund_code}\n数据格式化失败: {e!s}"
 
 
+# 场外基金阶段收益的展示顺序
+STAGE_PERIODS = ("近1月", "近3月", "近6月", "近1年", "近3年", "近5年")
+
+
 def format_fund_info(fund_code: str, fund_data: dict) -> str:
     """格式化基金信息文本"""
     try:
@@ -895,9 +965,12 @@ def format_fund_info(fund_code: str, fund_data: dict) -> str:
         else:
             fund_name = f"基金 {fund_code}"
 
-        # 获取最近交易日的数据
+        # 获取最近交易日的数据：整列取出为 Python 列表后倒序遍历，避免逐行 iterrows
         display_days = _get_config_value("fund_display_recent_days", DEFAULT_DISPLAY_RECENT_DAYS)
-        recent_nav = nav_df.tail(display_days).iloc[::-1]
+        recent_nav = nav_df.tail(display_days)
+        nav_count = len(recent_nav)
+        nav_dates = _column_values(recent_nav, "净值日期", "", nav_count)
+        nav_returns = _column_values(recent_nav, "日增长率", 0, nav_count)
 
         # 构建信息文本
         info_lines = [
@@ -907,31 +980,38 @@ def format_fund_info(fund_code: str, fund_data: dict) -> str:
             "最近交易日收益:",
         ]
 
-        for _, row in recent_nav.iterrows():
+        for date_str, raw_return in zip(reversed(nav_dates), reversed(nav_returns), strict=True):
             try:
-                date_str = row.get("净值日期", "")
-                daily_return = float(row.get("日增长率", 0))
-                if daily_return > 0:
-                    info_lines.append(f"{date_str}: +{daily_return:.2f}%")
-                else:
-                    info_lines.append(f"{date_str}: {daily_return:.2f}%")
+                daily_return = float(raw_return)
             except (ValueError, TypeError):
                 continue
+            sign = "+" if daily_return > 0 else ""
+            info_lines.append(f"{date_str}: {sign}{daily_return:.2f}%")
 
         info_lines.extend(["", "阶段收益:"])
 
-        # 添加阶段收益数据
-        stage_periods = ["近1月", "近3月", "近6月", "近1年", "近3年", "近5年"]
-        for period in stage_periods:
+        # 添加阶段收益数据：先把 周期 -> 收益 建成字典（同一周期取首行），再按固定顺序输出
+        try:
+            periods = achievement_df["周期"].tolist()
+            period_returns = achievement_df["本产品区间收益"].tolist()
+        except KeyError as e:
+            logger.debug(f"跳过阶段收益数据: {e}")
+            periods, period_returns = [], []
+
+        stage_returns: dict[Any, Any] = {}
+        for period, return_rate in zip(periods, period_returns, strict=True):
+            stage_returns.setdefault(period, return_rate)
+
+        for period in STAGE_PERIODS:
+            if period not in stage_returns:
+                continue
             try:
-                period_data = achievement_df[achievement_df["周期"] == period]
-                if not period_data.empty:
-                    return_rate = float(period_data.iloc[0]["本产品区间收益"])
-                    info_lines.append(f"{period}: {return_rate:.2f}%")
-            except (KeyError, ValueError, IndexError) as e:
-                # 如果某个周期的数据不存在或格式错误,跳过该周期
+                return_rate = float(stage_returns[period])
+            except (ValueError, TypeError) as e:
+                # 如果某个周期的数据格式错误,跳过该周期
                 logger.debug(f"跳过周期 {period} 的数据: {e}")
                 continue
+            info_lines.append(f"{period}: {return_rate:.2f}%")
 
         return "\n".join(info_lines)
 
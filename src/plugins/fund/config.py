@@ -1,6 +1,6 @@
 from typing import Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class Config(BaseModel):
@@ -9,6 +9,8 @@ class Config(BaseModel):
     遵循 NoneBot2 插件配置标准，支持环境变量和配置文件
     """
 
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
     # 插件开关
     fund_plugin_enabled: bool = Field(default=True, description="是否启用基金查询插件")
 
@@ -12,91 +12,106 @@
 最后验证时间：2025-11（基于维基百科权威数据）
 """
 
-from typing import Final
+from enum import IntEnum
+from typing import Final, Literal
 
 # ==================== 股票市场前缀规则 ====================
 
 # 上海证券交易所（SSE）：使用三位前缀（更精确）
-# 使用 set 以实现 O(1) 查找性能（统一数据结构）
-STOCK_PREFIXES_SH: Final[set[str]] = {
-    "600",  # SSE 主板 A 股
-    "601",
-    "603",
-    "605",
-    "688",  # 科创板
-    "689",  # 科创板相关存托凭证/特殊号段
-    "900",  # 补充：SSE B 股
-}
+# 使用 frozenset 以实现 O(1) 查找性能（统一数据结构，且不可变）
+STOCK_PREFIXES_SH: Final[frozenset[str]] = frozenset(
+    {
+        "600",  # SSE 主板 A 股
+        "601",
+        "603",
+        "605",
+        "688",  # 科创板
+        "689",  # 科创板相关存托凭证/特殊号段
+        "900",  # 补充：SSE B 股
+    }
+)
 
 # 深圳证券交易所（SZSE）：使用三位前缀（更精确）
-# 使用 set 以实现 O(1) 查找性能（统一数据结构）
-STOCK_PREFIXES_SZ: Final[set[str]] = {
-    "000",  # 主板
-    "001",  # 主板/互补号段
-    "002",  # 主板（原中小板）
-    "300",  # 创业板
-    "200",  # 补充：SZSE B 股
-}
+# 使用 frozenset 以实现 O(1) 查找性能（统一数据结构，且不可变）
+STOCK_PREFIXES_SZ: Final[frozenset[str]] = frozenset(
+    {
+        "000",  # 主板
+        "001",  # 主板/互补号段
+        "002",  # 主板（原中小板）
+        "300",  # 创业板
+        "200",  # 补充：SZSE B 股
+    }
+)
 
 # 北京证券交易所（BSE）：使用两位前缀（北交所代码为8位数字，前两位标识）
-# 使用 set 以实现 O(1) 查找性能（用于 in 操作）
-STOCK_PREFIXES_BJ: Final[set[str]] = {
-    "43",  # 精选层历史代码
-    "83",  # 北交所上市代码段
-    "87",  # 北交所上市代码段
-    "88",  # 北交所上市代码段
-}
+# 使用 frozenset 以实现 O(1) 查找性能（用于 in 操作）
+STOCK_PREFIXES_BJ: Final[frozenset[str]] = frozenset(
+    {
+        "43",  # 精选层历史代码
+        "83",  # 北交所上市代码段
+        "87",  # 北交所上市代码段
+        "88",  # 北交所上市代码段
+    }
+)
 
 
 # ==================== 场内基金（ETF / LOF / 其它上市基金）前缀规则 ====================
 
 # 上海交易所常见基金/ETF/LOF 前缀（以三位为单位更精确）
 # 扩充 ETF 覆盖范围 (51x/56x)
-ETF_PREFIXES_SH: Final[set[str]] = {
-    "510",  # 常见沪市 ETF 核心段
-    "511",
-    "512",
-    "513",
-    "515",
-    "516",
-    "517",
-    "518",  # 商品/特定 ETF
-    "550",  # 债券/货币 ETF 号段
-    "560",  # 债券/特定 ETF
-    "588",  # 科创/跨市场 ETF 号段
-}
-
-LOF_PREFIXES_SH: Final[set[str]] = {
-    "501",  # 上市开放式基金（LOF）普通号段
-    "502",  # 分级基金 LOF（如 502003 易方达中证军工）
-    "506",  # 科创板相关 LOF（科创板50ETF联接LOF等）
-    # 注意：500 前缀是契约型封闭式基金，已全部转型或清算，不是 LOF
-}
+ETF_PREFIXES_SH: Final[frozenset[str]] = frozenset(
+    {
+        "510",  # 常见沪市 ETF 核心段
+        "511",
+        "512",
+        "513",
+        "515",
+        "516",
+        "517",
+        "518",  # 商品/特定 ETF
+        "550",  # 债券/货币 ETF 号段
+        "560",  # 债券/特定 ETF
+        "588",  # 科创/跨市场 ETF 号段
+    }
+)
+
+LOF_PREFIXES_SH: Final[frozenset[str]] = frozenset(
+    {
+        "501",  # 上市开放式基金（LOF）普通号段
+        "502",  # 分级基金 LOF（如 502003 易方达中证军工）
+        "506",  # 科创板相关 LOF（科创板50ETF联接LOF等）
+        # 注意：500 前缀是契约型封闭式基金，已全部转型或清算，不是 LOF
+    }
+)
 
 # 深圳交易所常见场内基金号段
-ETF_PREFIXES_SZ: Final[set[str]] = {
-    "159",  # 深市交易型开放式指数基金（ETF）常见号段
-    # 150 建议移除，因其主要用于分级基金子份额，非主流 ETF
-}
-
-LOF_PREFIXES_SZ: Final[set[str]] = {
-    "160",  # LOF 在深交所常见以 160-169 为起始号段
-    "161",
-    "162",
-    "163",
-    "164",
-    "165",
-    "166",
-    "167",
-    "168",
-    "169",
-}
+ETF_PREFIXES_SZ: Final[frozenset[str]] = frozenset(
+    {
+        "159",  # 深市交易型开放式指数基金（ETF）常见号段
+        # 150 建议移除，因其主要用于分级基金子份额，非主流 ETF
+    }
+)
+
+LOF_PREFIXES_SZ: Final[frozenset[str]] = frozenset(
+    {
+        "160",  # LOF 在深交所常见以 160-169 为起始号段
+        "161",
+        "162",
+        "163",
+        "164",
+        "165",
+        "166",
+        "167",
+        "168",
+        "169",
+    }
+)
 
 # 所有 ETF 前缀（合并）
-ETF_PREFIXES_ALL: Final[set[str]] = ETF_PREFIXES_SH | ETF_PREFIXES_SZ
+ETF_PREFIXES_ALL: Final[frozenset[str]] = ETF_PREFIXES_SH | ETF_PREFIXES_SZ
 
 # 所有 LOF 前缀（合并）
-LOF_PREFIXES_ALL: Final[set[str]] = LOF_PREFIXES_SH | LOF_PREFIXES_SZ
+LOF_PREFIXES_ALL: Final[frozenset[str]] = LOF_PREFIXES_SH | LOF_PREFIXES_SZ
 
 
 # ==================== 场外/开放式公募基金（非上市基金）前缀规则 ====================
@@ -117,27 +132,70 @@ LOF_PREFIXES_ALL: Final[set[str]] = LOF_PREFIXES_SH | LOF_PREFIXES_SZ
 #
 # 注意：识别逻辑会先检查三位前缀的场内基金（ETF/LOF），
 # 因此这里包含所有潜在的场外基金前缀（00-89）是安全的
-OFF_MARKET_FUND_PREFIXES: Final[set[str]] = {f"{i:02d}" for i in range(90)}  # 00-89
+OFF_MARKET_FUND_PREFIXES: Final[frozenset[str]] = frozenset(f"{i:02d}" for i in range(90))  # 00-89
 
 # 场内开放式基金申赎代码（上交所）
-OFF_MARKET_TRADING_PREFIX_SH: Final[set[str]] = {"519"}
+OFF_MARKET_TRADING_PREFIX_SH: Final[frozenset[str]] = frozenset({"519"})
 
 
 # ==================== 纯指数代码前缀规则 (非交易标的) ====================
 
 # 上海证券交易所指数代码前缀
-INDEX_PREFIXES_SH: Final[set[str]] = {
-    "000",  # 000xxx 系列，如上证指数 (000001)、沪深300指数 (000300) 等
-    # 注意：999 前缀是 B 股代码，不是指数代码
-}
+INDEX_PREFIXES_SH: Final[frozenset[str]] = frozenset(
+    {
+        "000",  # 000xxx 系列，如上证指数 (000001)、沪深300指数 (000300) 等
+        # 注意：999 前缀是 B 股代码，不是指数代码
+    }
+)
 
 # 深圳证券交易所指数代码前缀
-INDEX_PREFIXES_SZ: Final[set[str]] = {
-    "399",  # 399xxx 系列，如深证成指 (399001)、创业板指 (399006) 等
-}
+INDEX_PREFIXES_SZ: Final[frozenset[str]] = frozenset(
+    {
+        "399",  # 399xxx 系列，如深证成指 (399001)、创业板指 (399006) 等
+    }
+)
 
 # 所有指数前缀（合并）
-INDEX_PREFIXES_ALL: Final[set[str]] = INDEX_PREFIXES_SH | INDEX_PREFIXES_SZ
+INDEX_PREFIXES_ALL: Final[frozenset[str]] = INDEX_PREFIXES_SH | INDEX_PREFIXES_SZ
+
+
+# ==================== 合并前缀表 ====================
+
+# 三位前缀的类别标记，供 classify_code 一次查表完成分类
+_FLAG_ETF: Final[int] = 1
+_FLAG_LOF: Final[int] = 2
+_FLAG_INDEX: Final[int] = 4
+_FLAG_STOCK_SH: Final[int] = 8
+_FLAG_STOCK_SZ: Final[int] = 16
+
+
+def _build_prefix_flags() -> dict[str, int]:
+    """将各类三位前缀集合合并为 {前缀: 类别标记} 表"""
+    flags: dict[str, int] = {}
+    for prefixes, flag in (
+        (ETF_PREFIXES_ALL, _FLAG_ETF),
+        (LOF_PREFIXES_ALL, _FLAG_LOF),
+        (INDEX_PREFIXES_ALL, _FLAG_INDEX),
+        (STOCK_PREFIXES_SH, _FLAG_STOCK_SH),
+        (STOCK_PREFIXES_SZ, _FLAG_STOCK_SZ),
+    ):
+        for prefix in prefixes:
+            flags[prefix] = flags.get(prefix, 0) | flag
+    return flags
+
+
+PREFIX_FLAGS: Final[dict[str, int]] = _build_prefix_flags()
+
+CodeCategory = Literal["etf", "lof", "off", "index", "stock_sh", "stock_sz", "stock_bj", "unknown"]
+
+# 按判定优先级排列的 (标记, 类别)
+_FLAG_CATEGORIES: Final[tuple[tuple[int, CodeCategory], ...]] = (
+    (_FLAG_ETF, "etf"),
+    (_FLAG_LOF, "lof"),
+    (_FLAG_INDEX, "index"),
+    (_FLAG_STOCK_SH, "stock_sh"),
+    (_FLAG_STOCK_SZ, "stock_sz"),
+)
 
 
 # ==================== 市场验证函数 ====================
@@ -291,7 +349,36 @@ def is_shenzhen_index(code: str) -> bool:
     return code[:3] in INDEX_PREFIXES_SZ
 
 
-def _format_prefixes(prefixes: set[str], simplify: bool = True) -> str:
+def classify_code(code: str) -> CodeCategory:
+    """一次性判断代码所属类别
+
+    只切片一次并查询合并前缀表，等价于依次调用 is_etf / is_lof / is_index /
+    is_shanghai_stock / is_shenzhen_stock / is_off_market_fund。
+    000 前缀同时是上证指数和深市股票，按指数优先返回 "index"。
+
+    Args:
+        code: 6位数字代码（北交所为8位）
+
+    Returns:
+        代码类别
+    """
+    length = len(code)
+    if length == 8:
+        return "stock_bj" if code[:2] in STOCK_PREFIXES_BJ else "unknown"
+    if length != 6:
+        return "unknown"
+
+    flags = PREFIX_FLAGS.get(code[:3], 0)
+    if flags:
+        for flag, category in _FLAG_CATEGORIES:
+            if flags & flag:
+                return category
+    if code[:2] in OFF_MARKET_FUND_PREFIXES:
+        return "off"
+    return "unknown"
+
+
+def _format_prefixes(prefixes: frozenset[str], simplify: bool = True) -> str:
     """格式化前缀集合为友好的字符串提示"""
     if simplify:
         # 只显示前两位作为简化（如 60/68 而非 600/601/688）
@@ -299,41 +386,75 @@ def _format_prefixes(prefixes: set[str], simplify: bool = True) -> str:
     return "/".join(sorted(prefixes))
 
 
-def validate_market_code(code: str, market: str) -> tuple[bool, str | None]:
+# 错误提示中的前缀说明，模块加载时预先计算，避免每次校验失败都重新排序
+_SH_PREFIX_HINT: Final[str] = _format_prefixes(STOCK_PREFIXES_SH)
+_SZ_PREFIX_HINT: Final[str] = _format_prefixes(STOCK_PREFIXES_SZ)
+_BJ_PREFIX_HINT: Final[str] = _format_prefixes(STOCK_PREFIXES_BJ, simplify=False)
+
+
+class MarketError(IntEnum):
+    """代码与市场匹配校验结果"""
+
+    OK = 0  # 校验通过
+    NOT_SH = 1  # 不属于上海市场
+    NOT_SZ = 2  # 不属于深圳市场
+    NOT_BJ = 3  # 不属于北京市场
+    UNKNOWN = 4  # 未知的市场标识
+
+
+def validate_market_code(code: str, market: str) -> MarketError:
     """验证代码和市场的匹配性
 
+    只返回错误码，需要展示时再调用 format_market_error 生成提示文本。
+
     Args:
         code: 6位或8位数字代码（北交所为8位）
         market: 市场标识（'sh'、'sz' 或 'bj'）
 
     Returns:
-        (是否有效, 错误信息)。如果有效返回 (True, None)，否则返回 (False, 错误信息)
+        校验结果，有效时返回 MarketError.OK
     """
     match market.lower():
         case "sh":
             if not is_shanghai_stock(code):
-                prefixes_str = _format_prefixes(STOCK_PREFIXES_SH)
-                return (
-                    False,
-                    f"股票代码 {code} 不属于上海市场(.SH)，上海股票应以 {prefixes_str}X 开头",
-                )
+                return MarketError.NOT_SH
         case "sz":
             if not is_shenzhen_stock(code):
-                prefixes_str = _format_prefixes(STOCK_PREFIXES_SZ)
-                return (
-                    False,
-                    f"股票代码 {code} 不属于深圳市场(.SZ)，深圳股票应以 {prefixes_str}X 开头",
-                )
+                return MarketError.NOT_SZ
         case "bj":
             if not is_beijing_stock(code):
-                prefixes_str = _format_prefixes(STOCK_PREFIXES_BJ, simplify=False)
-                msg = f"股票代码 {code} 不属于北京市场(.BJ)，"
-                msg += f"北交所股票应为8位数字且以 {prefixes_str} 开头"
-                return (False, msg)
+                return MarketError.NOT_BJ
         case _:
-            return False, f"未知的市场标识: {market}"
+            return MarketError.UNKNOWN
+
+    return MarketError.OK
+
 
-    return True, None
+def format_market_error(err: MarketError, code: str, market: str) -> str | None:
+    """将校验结果格式化为错误提示
+
+    Args:
+        err: validate_market_code 返回的校验结果
+        code: 6位或8位数字代码
+        market: 市场标识
+
+    Returns:
+        错误信息，校验通过时返回 None
+    """
+    match err:
+        case MarketError.OK:
+            return None
+        case MarketError.NOT_SH:
+            return f"股票代码 {code} 不属于上海市场(.SH)，上海股票应以 {_SH_PREFIX_HINT}X 开头"
+        case MarketError.NOT_SZ:
+            return f"股票代码 {code} 不属于深圳市场(.SZ)，深圳股票应以 {_SZ_PREFIX_HINT}X 开头"
+        case MarketError.NOT_BJ:
+            return (
+                f"股票代码 {code} 不属于北京市场(.BJ)，"
+                f"北交所股票应为8位数字且以 {_BJ_PREFIX_HINT} 开头"
+            )
+        case _:
+            return f"未知的市场标识: {market}"
 
 
 def infer_stock_market(code: str) -> str:
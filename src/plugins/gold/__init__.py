@@ -1,6 +1,5 @@
 import asyncio
 import io
-import json
 import re
 import time
 from collections import deque
@@ -8,7 +7,8 @@ from datetime import datetime
 
 import aiohttp
 import matplotlib.pyplot as plt
-from nonebot import get_driver, get_plugin_config, logger, on_fullmatch, on_regex, require
+import orjson
+from nonebot import get_driver, logger, on_fullmatch, on_regex, require
 from nonebot.adapters.onebot.v11 import (
     Bot,
     Event,
@@ -16,8 +16,10 @@ from nonebot.adapters.onebot.v11 import (
     MessageSegment,
     PrivateMessageEvent,
 )
+from nonebot.compat import model_dump
 from nonebot.params import RegexGroup
 from nonebot.plugin import PluginMetadata
+from pydantic import TypeAdapter
 
 from src.storage import get_db
 
@@ -33,7 +35,9 @@ __plugin_meta__ = PluginMetadata(
     config=Config,
 )
 
-config = get_plugin_config(Config)
+# 复用同一个 TypeAdapter 的已编译校验器加载插件配置
+_CONFIG_ADAPTER = TypeAdapter(Config)
+config = _CONFIG_ADAPTER.validate_python(model_dump(get_driver().config))
 
 
 # ==================== Rule 检查函数 ====================
@@ -69,6 +73,8 @@ gold_chart = on_regex(
 cooldown_dict = {}
 
 PRICE_HISTORY_LIMIT = max(86400, config.price_history_limit)
+# 金价接口响应解析失败时，日志中附带的响应体预览长度
+GOLD_RESPONSE_PREVIEW_LENGTH = 200
 MIN_WINDOW_SECONDS = config.min_window_seconds
 CHART_WINDOW_SECONDS = max(MIN_WINDOW_SECONDS, config.chart_window_hours * 3600)
 price_history: deque[tuple[float, float]] = deque(maxlen=PRICE_HISTORY_LIMIT)
@@ -110,22 +116,28 @@ async def load_price_history() -> None:
 
 
 async def persist_price(timestamp: float, price: float) -> None:
-    """写入数据库并维护内存中的价格历史"""
+    """写入数据库并维护内存中的价格历史
+
+    淘汰旧记录与写入新记录在同一事务中完成，只需一次提交
+    """
+    operations: list[tuple[str, tuple[float, ...]]] = []
     if len(price_history) == PRICE_HISTORY_LIMIT:
         oldest_timestamp, _ = price_history.popleft()
-        await db.execute(
-            "DELETE FROM gold_price_history WHERE timestamp = ?",
-            (oldest_timestamp,),
+        operations.append(
+            ("DELETE FROM gold_price_history WHERE timestamp = ?", (oldest_timestamp,))
         )
 
     price_history.append((timestamp, price))
-    await db.execute(
-        """
-        INSERT OR REPLACE INTO gold_price_history (timestamp, price)
-        VALUES (?, ?)
-        """,
-        (timestamp, price),
+    operations.append(
+        (
+            """
+            INSERT OR REPLACE INTO gold_price_history (timestamp, price)
+            VALUES (?, ?)
+            """,
+            (timestamp, price),
+        )
     )
+    await db.execute_batch(operations)
 
 
 async def fetch_gold_price() -> float | None:
@@ -146,8 +158,32 @@ async def fetch_gold_price() -> float | None:
                 config.API_URL, data=config.API_PAYLOAD, headers=config.API_HEADERS
             ) as response,
         ):
-            # 异步读取 JSON 响应
-            json_data = await response.json()
+            # 非 2xx 状态按 HTTP 请求失败处理；与 response.json() 一致，只接受 JSON 响应
+            response.raise_for_status()
+            if response.content_type != "application/json":
+                logger.error(
+                    f"金价接口返回了非 JSON 响应: status={response.status}, "
+                    f"content_type={response.content_type}"
+                )
+                return None
+
+            # 读取原始响应体并用 orjson 解析 JSON；声明了非 UTF-8 编码时先按该编码解码
+            raw = await response.read()
+            charset = response.charset
+            body: bytes | str = (
+                raw.decode(response.get_encoding())
+                if charset and charset.lower() not in ("utf-8", "utf8")
+                else raw
+            )
+            try:
+                json_data = orjson.loads(body)
+            except orjson.JSONDecodeError as e:
+                preview = body[:GOLD_RESPONSE_PREVIEW_LENGTH]
+                logger.error(
+                    f"解析金价数据失败: {e} (status={response.status}, "
+                    f"content_type={response.content_type}, body={preview!r})"
+                )
+                return None
 
             # 解析金价数据
             if json_data.get("success"):
@@ -170,6 +206,22 @@ async def fetch_gold_price() -> float | None:
         return None
 
 
+async def get_current_price() -> float | None:
+    """获取当前金价
+
+    优先返回定时任务记录的最新价格，仅当其缺失或超过两个采集周期未更新时才实时请求
+
+    Returns:
+        float | None: 金价，失败时返回 None
+    """
+    if price_history:
+        timestamp, price = price_history[-1]
+        if time.time() - timestamp < config.price_fetch_interval * 2:
+            return price
+
+    return await fetch_gold_price()
+
+
 @scheduler.scheduled_job("interval", seconds=config.price_fetch_interval)
 async def record_price():
     """定时记录金价"""
@@ -234,7 +286,7 @@ async def handle_group_gold_query(bot: Bot, event: GroupMessageEvent) -> None:
             remaining_time = 1
         await gold.finish(f"冷却中，请等待 {remaining_time} 秒后再试")
 
-    price = await fetch_gold_price()
+    price = await get_current_price()
     if price is not None:
         # 更新冷却时间
         if group_id not in cooldown_dict:
@@ -249,7 +301,7 @@ async def handle_group_gold_query(bot: Bot, event: GroupMessageEvent) -> None:
 @gold.handle()
 async def handle_private_gold_query(bot: Bot, event: PrivateMessageEvent) -> None:
     """处理私聊金价查询（无冷却限制）"""
-    price = await fetch_gold_price()
+    price = await get_current_price()
     if price is not None:
         await gold.finish(f"{price}")
     else:
@@ -290,29 +342,55 @@ WINDOW_PATTERN = re.compile(
     re.IGNORECASE,
 )
 
-
-def parse_window_spec(spec: str) -> int | None:
-    match = WINDOW_PATTERN.search(spec)
-    if not match:
+# 时间单位 -> 秒数
+WINDOW_UNIT_SECONDS: dict[str, int] = {
+    "分钟": 60,
+    "分": 60,
+    "min": 60,
+    "m": 60,
+    "小时": 3600,
+    "时": 3600,
+    "h": 3600,
+    "天": 86400,
+    "日": 86400,
+    "d": 86400,
+    "周": 7 * 86400,
+    "星期": 7 * 86400,
+    "w": 7 * 86400,
+    "月": 30 * 86400,
+}
+
+
+def _parse_window_fast(spec: str) -> float | None:
+    """快速解析 "24h"、"7d" 这类纯英文单字母写法，返回秒数
+
+    无法处理时返回 None，交由正则解析
+    """
+    unit_seconds = WINDOW_UNIT_SECONDS.get(spec[-1:].lower()) if spec.isascii() else None
+    if unit_seconds is None:
         return None
 
-    value = float(match.group("value"))
-    unit = match.group("unit").lower()
-
-    if unit in {"分钟", "分", "min", "m"}:
-        base = 60
-    elif unit in {"小时", "时", "h"}:
-        base = 3600
-    elif unit in {"天", "日", "d"}:
-        base = 86400
-    elif unit in {"周", "星期", "w"}:
-        base = 7 * 86400
-    elif unit == "月":
-        base = 30 * 86400
-    else:
+    integer, dot, fraction = spec[:-1].partition(".")
+    if not integer.isdecimal() or (dot and not fraction.isdecimal()):
         return None
+    return float(spec[:-1]) * unit_seconds
+
+
+def parse_window_spec(spec: str) -> int | None:
+    spec = spec.strip()
+    raw_seconds = _parse_window_fast(spec)
+
+    if raw_seconds is None:
+        match = WINDOW_PATTERN.search(spec)
+        if not match:
+            return None
+
+        base = WINDOW_UNIT_SECONDS.get(match.group("unit").lower())
+        if base is None:
+            return None
+        raw_seconds = float(match.group("value")) * base
 
-    seconds = int(value * base)
+    seconds = int(raw_seconds)
     if seconds <= 0:
         return None
     return max(MIN_WINDOW_SECONDS, seconds)
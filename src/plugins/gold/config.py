@@ -1,9 +1,13 @@
+from collections.abc import Mapping
+from types import MappingProxyType
 from typing import Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class Config(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
     # 功能开关
     gold_plugin_enabled: bool = Field(default=True, description="是否启用金价查询插件")
     gold_enable_price_query: bool = Field(default=True, description="是否启用金价查询功能")
@@ -28,21 +32,25 @@ class Config(BaseModel):
     price_history_limit: int = 86400  # 内存中保留的历史数据最大数量
     min_window_seconds: int = 3600  # 趋势图最小时间窗口（秒），默认为一小时
     API_URL: str = "https://mbmodule-openapi.paas.cmbchina.com/product/v1/func/market-center"
-    API_HEADERS: dict = {
-        "Host": "mbmodule-openapi.paas.cmbchina.com",
-        "Connection": "keep-alive",
-        "sec-ch-ua": '"Chromium";v="128", "Not;A=Brand";v="24", "Android WebView";v="128"',
-        "Accept": "application/json, text/plain, */*",
-        "sec-ch-ua-platform": "Android",
-        "sec-ch-ua-mobile": "?1",
-        "User-Agent": "Mozilla/5.0 (Windows NT 6.1; WOW64; rv:34.0) Gecko/20100101 Firefox/34.0",
-        "Origin": "https://mbmodulecdn.cmbimg.com",
-        "X-Requested-With": "cmb.pb",
-        "Sec-Fetch-Site": "cross-site",
-        "Sec-Fetch-Mode": "cors",
-        "Sec-Fetch-Dest": "empty",
-        "Referer": "https://mbmodulecdn.cmbimg.com/",
-        "Accept-Language": "zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7",
-        "Content-Type": "application/x-www-form-urlencoded",
-    }
+    API_HEADERS: Mapping[str, str] = Field(
+        default_factory=lambda: MappingProxyType(
+            {
+                "Host": "mbmodule-openapi.paas.cmbchina.com",
+                "Connection": "keep-alive",
+                "sec-ch-ua": '"Chromium";v="128", "Not;A=Brand";v="24", "Android WebView";v="128"',
+                "Accept": "application/json, text/plain, */*",
+                "sec-ch-ua-platform": "Android",
+                "sec-ch-ua-mobile": "?1",
+                "User-Agent": "Mozilla/5.0 (Windows NT 6.1; WOW64; rv:34.0) Gecko/20100101 Firefox/34.0",
+                "Origin": "https://mbmodulecdn.cmbimg.com",
+                "X-Requested-With": "cmb.pb",
+                "Sec-Fetch-Site": "cross-site",
+                "Sec-Fetch-Mode": "cors",
+                "Sec-Fetch-Dest": "empty",
+                "Referer": "https://mbmodulecdn.cmbimg.com/",
+                "Accept-Language": "zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7",
+                "Content-Type": "application/x-www-form-urlencoded",
+            }
+        )
+    )
     API_PAYLOAD: str = 'params=[{"prdType":"H","prdCode":""}]'
@@ -1,4 +1,4 @@
-from collections.abc import Callable
+from collections.abc import Callable, Collection
 from typing import Any, Literal
 
 from nonebot.adapters.onebot.v11 import Event, GroupMessageEvent
@@ -23,12 +23,40 @@ class GroupPermissionMixin(BaseModel):
     )
 
 
+# 群组判定函数: (群号, 白名单, 黑名单) -> 是否启用
+GroupModePredicate = Callable[[str, Collection[str], Collection[str]], bool]
+
+
+def _allow_all(group_id: str, whitelist: Collection[str], blacklist: Collection[str]) -> bool:
+    return True
+
+
+def _allow_whitelisted(
+    group_id: str, whitelist: Collection[str], blacklist: Collection[str]
+) -> bool:
+    return group_id in whitelist
+
+
+def _allow_not_blacklisted(
+    group_id: str, whitelist: Collection[str], blacklist: Collection[str]
+) -> bool:
+    return group_id not in blacklist
+
+
+# 群组控制模式 -> 判定函数；未知模式按 all 处理（默认启用）
+GROUP_MODE_PREDICATES: dict[str, GroupModePredicate] = {
+    "all": _allow_all,
+    "whitelist": _allow_whitelisted,
+    "blacklist": _allow_not_blacklisted,
+}
+
+
 def check_group_permission(
     event: Event,
     enabled: bool,
     group_mode: str,
-    group_whitelist: list[str],
-    group_blacklist: list[str],
+    group_whitelist: Collection[str],
+    group_blacklist: Collection[str],
 ) -> bool:
     """检查插件是否在当前群启用
 
@@ -36,8 +64,8 @@ def check_group_permission(
         event: 事件对象
         enabled: 插件全局开关
         group_mode: 群组控制模式 (all/whitelist/blacklist)
-        group_whitelist: 白名单群组列表
-        group_blacklist: 黑名单群组列表
+        group_whitelist: 白名单群组集合
+        group_blacklist: 黑名单群组集合
 
     Returns:
         bool: 是否启用
@@ -50,18 +78,73 @@ def check_group_permission(
     if not isinstance(event, GroupMessageEvent):
         return True
 
-    # 获取群号
-    group_id = str(event.group_id)
+    predicate = GROUP_MODE_PREDICATES.get(group_mode, _allow_all)
+    return predicate(str(event.group_id), group_whitelist, group_blacklist)
 
-    # 根据模式判断
-    if group_mode == "all":
-        return True
-    if group_mode == "whitelist":
-        return group_id in group_whitelist
-    if group_mode == "blacklist":
-        return group_id not in group_blacklist
-    # 未知模式，默认启用
-    return True
+
+class _FrozenView:
+    """配置列表的 frozenset 视图
+
+    仅在配置中的列表对象被整体替换时才重新构建集合，使成员判断为 O(1)。
+    持有源列表的引用而不是 id()，避免旧列表被回收后 id 被复用导致误判。
+    """
+
+    __slots__ = ("_frozen", "_source")
+
+    def __init__(self) -> None:
+        self._source: Any = None
+        self._frozen: frozenset[str] = frozenset()
+
+    def get(self, items: Collection[str]) -> frozenset[str]:
+        if items is not self._source:
+            self._source = items
+            self._frozen = frozenset(items)
+        return self._frozen
+
+
+def _group_attr_names(prefix: str) -> tuple[str, str, str]:
+    """返回 (群组模式, 白名单, 黑名单) 三个配置属性名"""
+    return f"{prefix}group_mode", f"{prefix}group_whitelist", f"{prefix}group_blacklist"
+
+
+def _build_permission_rule(
+    config_getter: Callable[[], Any],
+    enabled_attrs: tuple[str, ...],
+    group_attrs: tuple[str, str, str],
+) -> Callable[[Event], bool]:
+    """根据预先计算好的属性名构建规则检查函数
+
+    Args:
+        config_getter: 获取配置对象的函数
+        enabled_attrs: 需全部为真才启用的开关属性名（按检查顺序排列）
+        group_attrs: (群组模式, 白名单, 黑名单) 三个配置属性名
+
+    Returns:
+        群组规则检查函数
+    """
+    mode_attr, whitelist_attr, blacklist_attr = group_attrs
+    whitelist_view = _FrozenView()
+    blacklist_view = _FrozenView()
+
+    async def permission_rule(event: Event) -> bool:
+        config = config_getter()
+        for enabled_attr in enabled_attrs:
+            if not getattr(config, enabled_attr, True):
+                return False
+
+        # 私聊消息始终启用
+        if not isinstance(event, GroupMessageEvent):
+            return True
+
+        # 每次按当前配置的模式取判定函数，配置被替换后无需额外的失效机制
+        predicate = GROUP_MODE_PREDICATES.get(getattr(config, mode_attr, "all"), _allow_all)
+        return predicate(
+            str(event.group_id),
+            whitelist_view.get(getattr(config, whitelist_attr, ())),
+            blacklist_view.get(getattr(config, blacklist_attr, ())),
+        )
+
+    return permission_rule
 
 
 def create_group_rule(
@@ -85,23 +168,7 @@ def create_group_rule(
         >>> # 在 on_regex 中使用
         >>> fund_query = on_regex(pattern, rule=fund_rule)
     """
-
-    async def group_rule(event: Event) -> bool:
-        config = config_getter()
-        enabled = getattr(config, plugin_enabled_attr, True)
-
-        # 构建配置属性名
-        mode_attr = f"{prefix}group_mode" if prefix else "group_mode"
-        whitelist_attr = f"{prefix}group_whitelist" if prefix else "group_whitelist"
-        blacklist_attr = f"{prefix}group_blacklist" if prefix else "group_blacklist"
-
-        group_mode = getattr(config, mode_attr, "all")
-        group_whitelist = getattr(config, whitelist_attr, [])
-        group_blacklist = getattr(config, blacklist_attr, [])
-
-        return check_group_permission(event, enabled, group_mode, group_whitelist, group_blacklist)
-
-    return group_rule
+    return _build_permission_rule(config_getter, (plugin_enabled_attr,), _group_attr_names(prefix))
 
 
 def create_sub_feature_rule(
@@ -132,31 +199,12 @@ def create_sub_feature_rule(
         ...     "gold_"
         ... )
     """
-
-    async def sub_feature_rule(event: Event) -> bool:
-        config = config_getter()
-
-        # 先检查子功能是否启用
-        feature_enabled = getattr(config, feature_enabled_attr, True)
-        if not feature_enabled:
-            return False
-
-        # 再检查群权限
-        plugin_enabled = getattr(config, plugin_enabled_attr, True)
-
-        mode_attr = f"{prefix}group_mode" if prefix else "group_mode"
-        whitelist_attr = f"{prefix}group_whitelist" if prefix else "group_whitelist"
-        blacklist_attr = f"{prefix}group_blacklist" if prefix else "group_blacklist"
-
-        group_mode = getattr(config, mode_attr, "all")
-        group_whitelist = getattr(config, whitelist_attr, [])
-        group_blacklist = getattr(config, blacklist_attr, [])
-
-        return check_group_permission(
-            event, plugin_enabled, group_mode, group_whitelist, group_blacklist
-        )
-
-    return sub_feature_rule
+    # 先检查子功能是否启用，再检查插件开关与群权限
+    return _build_permission_rule(
+        config_getter,
+        (feature_enabled_attr, plugin_enabled_attr),
+        _group_attr_names(prefix),
+    )
 
 
 def create_platform_rule(
@@ -176,23 +224,6 @@ def create_platform_rule(
         >>> config = get_plugin_config(Config)
         >>> bilibili_rule = create_platform_rule(lambda: config, "bilibili")
     """
-
-    async def platform_rule(event: Event) -> bool:
-        config = config_getter()
-
-        # 检查平台开关
-        enabled_attr = f"enable_{platform}"
-        enabled = getattr(config, enabled_attr, True)
-
-        # 构建分群配置属性名
-        mode_attr = f"{platform}_group_mode"
-        whitelist_attr = f"{platform}_group_whitelist"
-        blacklist_attr = f"{platform}_group_blacklist"
-
-        group_mode = getattr(config, mode_attr, "all")
-        group_whitelist = getattr(config, whitelist_attr, [])
-        group_blacklist = getattr(config, blacklist_attr, [])
-
-        return check_group_permission(event, enabled, group_mode, group_whitelist, group_blacklist)
-
-    return platform_rule
+    return _build_permission_rule(
+        config_getter, (f"enable_{platform}",), _group_attr_names(f"{platform}_")
+    )
@@ -1,10 +1,20 @@
 import asyncio
 import re
 import sqlite3
-from collections import defaultdict
+from collections.abc import AsyncIterator, Iterable
+from functools import lru_cache
 from time import time
-
-from nonebot import get_plugin_config, logger, on_message, on_notice
+from typing import NamedTuple
+
+import ahocorasick
+from nonebot import (
+    get_driver,
+    get_plugin_config,
+    logger,
+    on_fullmatch,
+    on_message,
+    on_notice,
+)
 from nonebot.adapters.onebot.v11 import (
     Bot,
     Event,
@@ -28,124 +38,418 @@ __plugin_meta__ = PluginMetadata(
 )
 
 config = get_plugin_config(Config)
+driver = get_driver()
+
+# SQLite 3.32 起单条语句最多可绑定 32766 个参数，更早的版本为 999
+SQLITE_VARIABLE_LIMIT = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+# 批量删除时 group_id 与 user_id 各占一个参数，其余留给昵称
+MAX_DELETE_BATCH = min(config.sqlite_max_variable_number, SQLITE_VARIABLE_LIMIT) - 2
+logger.debug(
+    f"SQLite {sqlite3.sqlite_version} 参数上限 {SQLITE_VARIABLE_LIMIT}，"
+    f"批量删除每批最多 {MAX_DELETE_BATCH} 个昵称"
+)
 
 db = get_db()
-db.ensure_schema(
-    [
-        """
-        CREATE TABLE IF NOT EXISTS nicknames (
-            group_id TEXT NOT NULL,
-            user_id TEXT NOT NULL,
-            nickname TEXT NOT NULL,
-            PRIMARY KEY (group_id, user_id, nickname)
-        )
-        """,
-        """
-        CREATE INDEX IF NOT EXISTS idx_nicknames_group_nickname
-        ON nicknames (group_id, nickname)
-        """,
-    ]
+
+# 建表语句在启动钩子中于同一事务内执行，见 init_nickname_storage
+NICKNAME_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS nicknames (
+        group_id TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        nickname TEXT NOT NULL,
+        PRIMARY KEY (group_id, user_id, nickname)
+    )
+    """,
+)
+
+# 同一群内昵称唯一：用唯一索引替换原有的普通索引，让插入语句自身完成占用检查。
+# 唯一索引尚不存在时才执行一次迁移，见 migrate_nickname_unique_index
+NICKNAME_UNIQUE_INDEX = "uq_nicknames_group_nickname"
+NICKNAME_UNIQUE_INDEX_MIGRATION = (
+    "DROP INDEX IF EXISTS idx_nicknames_group_nickname",
+    f"CREATE UNIQUE INDEX {NICKNAME_UNIQUE_INDEX} ON nicknames (group_id, nickname)",
 )
+_SQL_INDEX_EXISTS = """
+    SELECT 1 FROM sqlite_master
+    WHERE type = 'index' AND name = ?
+"""
+# 群内重复的昵称绑定，按写入顺序排列，每组第一条为保留的记录
+_SQL_SELECT_DUPLICATE_NICKNAMES = """
+    SELECT n.rowid AS row_id, n.group_id, n.nickname, n.user_id
+    FROM nicknames AS n
+    JOIN (
+        SELECT group_id, nickname
+        FROM nicknames
+        GROUP BY group_id, nickname
+        HAVING COUNT(*) > 1
+    ) AS d USING (group_id, nickname)
+    ORDER BY n.group_id, n.nickname, n.rowid
+"""
+_SQL_DELETE_NICKNAME_BY_ROWID = "DELETE FROM nicknames WHERE rowid = ?"
+
+# 热路径 SQL 统一定义为模块常量，每次调用传入同一字符串，稳定命中连接的预编译语句缓存
+_SQL_INSERT_NICKNAME = """
+    INSERT INTO nicknames (group_id, user_id, nickname)
+    VALUES (?, ?, ?)
+    ON CONFLICT DO NOTHING
+    RETURNING user_id
+"""
+_SQL_SELECT_NICKNAME_OWNER = """
+    SELECT user_id
+    FROM nicknames
+    WHERE group_id = ? AND nickname = ?
+"""
+_SQL_SELECT_GROUP_NICKNAMES = """
+    SELECT nickname, user_id
+    FROM nicknames
+    WHERE group_id = ?
+"""
+# 昵称数最多的前若干个群的全部昵称，按群号排序以便逐群流式读取
+_SQL_SELECT_WARM_UP_NICKNAMES = """
+    SELECT group_id, nickname, user_id
+    FROM nicknames
+    WHERE group_id IN (
+        SELECT group_id
+        FROM nicknames
+        GROUP BY group_id
+        ORDER BY COUNT(*) DESC
+        LIMIT ?
+    )
+    ORDER BY group_id
+"""
+_SQL_SELECT_USER_NICKNAMES = """
+    SELECT nickname
+    FROM nicknames
+    WHERE group_id = ? AND user_id = ?
+    ORDER BY nickname
+"""
+_SQL_NICKNAME_EXISTS = """
+    SELECT 1 FROM nicknames
+    WHERE group_id = ? AND user_id = ? AND nickname = ?
+    LIMIT 1
+"""
+_SQL_DELETE_NICKNAME = """
+    DELETE FROM nicknames
+    WHERE group_id = ? AND user_id = ? AND nickname = ?
+"""
+_SQL_CLEAR_USER_NICKNAMES = """
+    DELETE FROM nicknames
+    WHERE group_id = ? AND user_id = ?
+    RETURNING nickname
+"""
+
+
+@lru_cache(maxsize=64)
+def _delete_nicknames_sql(count: int) -> str:
+    """按 IN 子句参数个数生成批量删除 SQL，相同个数复用同一字符串"""
+    placeholders = ",".join("?" * count)
+    return (
+        "DELETE FROM nicknames "  # noqa: S608
+        f"WHERE group_id = ? AND user_id = ? AND nickname IN ({placeholders}) "
+        "RETURNING nickname"
+    )
 
-# 昵称映射缓存: {group_id: (expires_at, {nickname: user_id})}
-_nickname_cache: dict[str, tuple[float, dict[str, str]]] = {}
-# 分群锁，避免跨群阻塞
-# 注意：锁一旦创建就不会被删除，因为清理锁会引入复杂的竞态条件问题。
-# 锁对象非常轻量，且实际使用中群组数量通常是有限的，内存开销可忽略不计。
-_cache_locks: dict[str, asyncio.Lock] = {}
-# 全局锁，用于保护 _cache_locks 字典的创建操作，避免竞态条件
-_global_lock = asyncio.Lock()
-CACHE_TTL = 300
+
+# 写路径都会精确清除对应群的缓存，TTL 只作为兜底的过期上限
+CACHE_TTL = 1800
 EMPTY_CACHE_TTL = 30
+CACHE_MAXSIZE = 1024
+
+# 缓存条目: (expires_at, {nickname: user_id}, 昵称自动机)
+NicknameCacheEntry = tuple[float, dict[str, str], ahocorasick.Automaton | None]
+
+
+class NicknameCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
 
 
-async def _get_group_lock(group_id: str) -> asyncio.Lock:
-    """获取指定群的缓存锁。
+class _NickCache:
+    """按群缓存昵称映射的 LFU + TTL 缓存
 
-    使用全局锁保护锁的创建，避免竞态条件下为同一 group_id 创建多个锁实例。
-    锁一旦创建就会永久保留，不会被清理。
+    群聊活跃度高度集中在少数群，按访问次数淘汰能让热门群常驻缓存。条目数达到 maxsize
+    时优先淘汰已过期的条目，其次淘汰访问次数最少的群，次数相同时淘汰最久未访问的群；
+    每写入 maxsize 次将所有计数减半，避免曾经热门、如今沉寂的群长期占用缓存。
+
+    回源前读取全局代数，写入时若该群在此之后发生过失效则放弃写入，避免写入旧数据。
+    各群的失效记录最多保留 maxsize 条，超出时丢弃最早的一条并把它的代数记为下限；
+    没有失效记录的群按下限保守判断，最坏只是少写一次缓存，不会写入旧数据。
     """
-    lock = _cache_locks.get(group_id)
-    if lock is not None:
-        return lock
 
-    async with _global_lock:
-        # 双重检查，避免重复创建
-        lock = _cache_locks.get(group_id)
-        if lock is None:
-            lock = asyncio.Lock()
-            _cache_locks[group_id] = lock
-        return lock
+    def __init__(self, maxsize: int) -> None:
+        self._maxsize = maxsize
+        # 按最近访问顺序排列（最久未访问的在前），用于访问次数相同时的淘汰顺序
+        self._entries: dict[str, NicknameCacheEntry] = {}
+        # 与 _entries 键集合一致的访问计数；条目过期或失效时保留计数，重新加载后继续累计
+        self._counts: dict[str, int] = {}
+        self._puts = 0
+        self._hits = 0
+        self._misses = 0
+        # 每次失效递增的全局代数
+        self._generation = 0
+        # 各群最近一次失效时的代数，按失效先后排列（最早的在前），最多 maxsize 条
+        self._invalidated_at: dict[str, int] = {}
+        # 已丢弃的失效记录中最大的代数，作为没有失效记录的群的保守下限
+        self._pruned_generation = 0
+
+    def generation(self) -> int:
+        """返回当前代数，回源前读取并在 put 时传回"""
+        return self._generation
+
+    def get(self, group_id: str) -> NicknameCacheEntry | None:
+        """返回未过期的缓存条目并累加访问计数"""
+        entry = self._entries.get(group_id)
+        if entry is None or time() >= entry[0]:
+            self._misses += 1
+            return None
+        self._hits += 1
+        self._counts[group_id] += 1
+        self._touch(group_id)
+        return entry
+
+    def peek(self, group_id: str) -> NicknameCacheEntry | None:
+        """返回未过期的缓存条目，不计入命中统计与访问计数"""
+        entry = self._entries.get(group_id)
+        if entry is None or time() >= entry[0]:
+            return None
+        return entry
+
+    def put(self, group_id: str, entry: NicknameCacheEntry, generation: int) -> None:
+        """写入缓存条目；generation 为回源前读取的代数，此后该群发生过失效时放弃写入"""
+        if self._invalidated_at.get(group_id, self._pruned_generation) > generation:
+            return
+        if group_id not in self._entries and len(self._entries) >= self._maxsize:
+            self._evict()
+        self._entries[group_id] = entry
+        self._touch(group_id)
+        # 新条目从 1 开始计数，刚加载的群不会因计数为 0 而被立即淘汰
+        self._counts.setdefault(group_id, 1)
+
+        self._puts += 1
+        if self._puts % self._maxsize == 0:
+            for key in self._counts:
+                self._counts[key] >>= 1
+
+    def invalidate(self, group_id: str) -> None:
+        self._generation += 1
+        # 先删除再插入，保持按失效先后排列
+        self._invalidated_at.pop(group_id, None)
+        self._invalidated_at[group_id] = self._generation
+        if len(self._invalidated_at) > self._maxsize:
+            oldest = next(iter(self._invalidated_at))
+            self._pruned_generation = self._invalidated_at.pop(oldest)
+        entry = self._entries.get(group_id)
+        if entry is not None:
+            # 仅标记为过期而不删除条目，保留该群的访问计数
+            self._entries[group_id] = (0.0, *entry[1:])
+            logger.debug(f"已清除群组 {group_id} 的昵称缓存")
+
+    def cache_info(self) -> NicknameCacheInfo:
+        return NicknameCacheInfo(self._hits, self._misses, self._maxsize, len(self._entries))
 
+    def _touch(self, group_id: str) -> None:
+        """将条目移到访问顺序的末尾（最近访问）"""
+        self._entries[group_id] = self._entries.pop(group_id)
+
+    def _evict(self) -> None:
+        now = time()
+        # min 返回第一个最小值，_entries 按访问顺序排列，计数相同时淘汰最久未访问的群
+        victim = min(
+            self._entries, key=lambda key: (self._entries[key][0] > now, self._counts[key])
+        )
+        del self._entries[victim]
+        del self._counts[victim]
 
-async def _invalidate_cache(group_id: str) -> None:
+
+_nickname_cache = _NickCache(CACHE_MAXSIZE)
+# 正在回源的群: {group_id: Future}，同一群并发的缓存未命中共享同一次数据库查询
+_inflight_loads: dict[str, asyncio.Future[NicknameCacheEntry]] = {}
+
+
+def _invalidate_cache(group_id: str) -> None:
     """清除指定群组的昵称映射缓存
 
-    注意：不能在获取锁之前检查缓存是否存在并提前返回，因为这会与并发的缓存写入
-    产生竞态条件。必须始终获取锁，确保检查/删除相对于缓存写入操作保持原子性。
+    清除只是一次字典操作，途中不会让出事件循环，因此无需加锁，也不必作为协程调度。
     """
-    lock = await _get_group_lock(group_id)
-    async with lock:
-        if group_id in _nickname_cache:
-            del _nickname_cache[group_id]
-            logger.debug(f"已清除群组 {group_id} 的昵称缓存")
+    _nickname_cache.invalidate(group_id)
 
 
-async def _get_cached_nickname_map(group_id: str) -> dict[str, str]:
-    """获取群组的昵称映射（带缓存）"""
-    # 快速路径：无锁检查缓存是否有效
+async def _get_cached_nickname_map(
+    group_id: str,
+) -> tuple[dict[str, str], ahocorasick.Automaton | None]:
+    """获取群组的昵称映射及对应的昵称自动机（带缓存）"""
     cached = _nickname_cache.get(group_id)
-    if cached and time() < cached[0]:
+    if cached is not None:
         logger.debug(f"使用群组 {group_id} 的昵称缓存")
-        return cached[1]
+        return cached[1], cached[2]
 
-    lock = await _get_group_lock(group_id)
-    async with lock:
-        # 双重检查，避免重复回源；重新获取时间戳避免跨 await 的过期判断误差
-        cached = _nickname_cache.get(group_id)
-        if cached and time() < cached[0]:
-            logger.debug(f"使用群组 {group_id} 的昵称缓存（锁内）")
-            return cached[1]
+    pending = _inflight_loads.get(group_id)
+    if pending is not None:
+        # shield 避免等待方被取消时连带取消这次共享的查询
+        entry = await asyncio.shield(pending)
+        logger.debug(f"复用群组 {group_id} 进行中的昵称查询")
+        return entry[1], entry[2]
 
+    future: asyncio.Future[NicknameCacheEntry] = asyncio.get_running_loop().create_future()
+    _inflight_loads[group_id] = future
+    try:
         logger.debug(f"从数据库查询群组 {group_id} 的昵称映射")
-        group_data = await fetch_group_nickname_map(group_id)
-
-        # 将 {user_id: [nicknames]} 转换为 {nickname: user_id}
-        nickname_to_qq: dict[str, str] = {}
-        for user_id, nicknames in group_data.items():
-            for nickname in nicknames:
-                nickname_to_qq[nickname] = user_id
+        generation = _nickname_cache.generation()
+        nickname_to_qq = await fetch_nickname_to_user_map(group_id)
+        automaton = build_nickname_automaton(nickname_to_qq)
 
         ttl = CACHE_TTL if nickname_to_qq else EMPTY_CACHE_TTL
         # DB 查询后使用新的时间戳计算过期时间，确保 TTL 准确
-        _nickname_cache[group_id] = (time() + ttl, nickname_to_qq)
+        entry = (time() + ttl, nickname_to_qq, automaton)
+        _nickname_cache.put(group_id, entry, generation)
         logger.debug(f"已缓存群组 {group_id} 的 {len(nickname_to_qq)} 个昵称映射，TTL={ttl}s")
+        future.set_result(entry)
+        return nickname_to_qq, automaton
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # 标记异常已被取回，没有等待方时不会在回收时输出 "never retrieved" 警告
+        future.exception()
+        raise
+    finally:
+        del _inflight_loads[group_id]
+
+
+# 同一条消息会依次经过多个规则与处理器，将纯文本与群号缓存在事件实例的 __dict__ 中；
+# pydantic 只序列化模型字段，这些额外的键不会出现在事件的导出结果里
+_PLAIN_TEXT_KEY = "_un_nickname_plain_text"
+_GROUP_ID_KEY = "_un_nickname_group_id"
+
+
+def _plain(event: GroupMessageEvent) -> str:
+    """获取消息去除首尾空白后的纯文本（按事件缓存）"""
+    cache = event.__dict__
+    try:
+        return cache[_PLAIN_TEXT_KEY]
+    except KeyError:
+        text = cache[_PLAIN_TEXT_KEY] = event.message.extract_plain_text().strip()
+        return text
+
+
+def _gid(event: GroupMessageEvent) -> str:
+    """获取字符串形式的群号（按事件缓存）"""
+    cache = event.__dict__
+    try:
+        return cache[_GROUP_ID_KEY]
+    except KeyError:
+        group_id = cache[_GROUP_ID_KEY] = str(event.group_id)
+        return group_id
+
+
+def _has_literal(event: GroupMessageEvent, needle: str) -> bool:
+    """判断任一文本段是否包含指定子串，用于在拼接纯文本前快速排除无关消息"""
+    return any(seg.type == "text" and needle in seg.data["text"] for seg in event.message)
 
-        return nickname_to_qq
+
+def _has_at(event: GroupMessageEvent) -> bool:
+    return any(seg.type == "at" for seg in event.message)
+
+
+# 添加、删除、清空命令的前缀都包含该关键字
+_COMMAND_KEYWORD = "昵称"
 
 
 def is_adding_nickname(event: GroupMessageEvent) -> bool:
-    msg = event.message
-    has_at = any(seg.type == "at" for seg in msg)
-    text = msg.extract_plain_text().strip()
-    return has_at and text.startswith("昵称")
+    return (
+        _has_literal(event, _COMMAND_KEYWORD)
+        and _has_at(event)
+        and _plain(event).startswith("昵称")
+    )
 
 
 def is_replacing_nickname(event: GroupMessageEvent) -> bool:
-    """检查消息是否包含 'at' 关键字"""
-    text = event.message.extract_plain_text()
-    return "at" in text
+    """检查消息是否包含 'at' 关键字，且所在群可能存在昵称"""
+    if "at" not in _plain(event):
+        return False
+    # 缓存表明该群没有任何昵称时不触发处理器，省去为每条消息创建处理任务
+    cached = _nickname_cache.peek(_gid(event))
+    return cached is None or bool(cached[1])
 
 
 add_nickname_matcher = on_message(rule=is_adding_nickname, priority=5, block=True)
 
 
 VALID_NICKNAME_PATTERN = re.compile(r"^[\u4e00-\u9fa5a-zA-Z0-9]+$")
+DELETE_COMMAND_PREFIXES = ("删除昵称", "移除昵称")
 AT_NICKNAME_PATTERN = re.compile(r"\bat\s*([\u4e00-\u9fa5a-zA-Z0-9]+)(?=\s|$)")
 
 
 def is_valid_nickname(nickname: str) -> bool:
-    return bool(VALID_NICKNAME_PATTERN.match(nickname))
+    """判断昵称是否只由汉字、字母和数字组成
+
+    与 VALID_NICKNAME_PATTERN 的判定一致（但不再放过正则 $ 允许的末尾换行），且不经过
+    正则引擎：纯 ASCII 昵称直接用 C 实现的 str.isalnum()（对 ASCII 字符串恰好等价于
+    [a-zA-Z0-9]），其余逐字符判断。
+    """
+    if not nickname:
+        return False
+    if nickname.isascii():
+        return nickname.isalnum()
+    return all(
+        "\u4e00" <= char <= "\u9fa5" or (char.isascii() and char.isalnum()) for char in nickname
+    )
+
+
+def build_nickname_automaton(nicknames: Iterable[str]) -> ahocorasick.Automaton | None:
+    """将群内所有昵称构建为 Aho-Corasick 自动机
+
+    Args:
+        nicknames: 昵称集合
+
+    Returns:
+        构建完成的自动机；没有任何昵称时返回 None
+    """
+    automaton = ahocorasick.Automaton()
+    for nickname in nicknames:
+        automaton.add_word(nickname, nickname)
+    if len(automaton) == 0:
+        return None
+    automaton.make_automaton()
+    return automaton
+
+
+def contains_any_nickname(automaton: ahocorasick.Automaton, text: str) -> bool:
+    """在 C 层单次扫描文本，判断其中是否出现任意已绑定的昵称
+
+    只要 AT_NICKNAME_PATTERN 能替换出某个昵称，该昵称必然作为子串出现在文本中，
+    因此返回 False 时可以安全跳过正则匹配与消息重建。
+    """
+    return next(automaton.iter(text), None) is not None
+
+
+def find_nickname_mentions(
+    text: str, nickname_to_qq: dict[str, str], automaton: ahocorasick.Automaton
+) -> list[tuple[int, int, str]]:
+    """查找文本中可替换为 @ 的 'at昵称'
+
+    Args:
+        text: 文本段内容
+        nickname_to_qq: 群内 {nickname: user_id} 映射
+        automaton: 由同一映射构建的昵称自动机
+
+    Returns:
+        [(起始位置, 结束位置, QQ 号)]，没有可替换的昵称时返回空列表
+    """
+    # 先用 C 层的子串判断与自动机扫描排除绝大多数消息，再交给正则精确匹配
+    if "at" not in text or not contains_any_nickname(automaton, text):
+        return []
+
+    spans: list[tuple[int, int, str]] = []
+    for match in AT_NICKNAME_PATTERN.finditer(text):
+        qq = nickname_to_qq.get(match.group(1))
+        if qq:
+            spans.append((match.start(), match.end(), qq))
+    return spans
 
 
 def extract_at_qq_from_message(msg: Message) -> str | None:
@@ -153,14 +457,13 @@ def extract_at_qq_from_message(msg: Message) -> str | None:
     return next((seg.data.get("qq") for seg in msg if seg.type == "at"), None)
 
 
-def extract_at_qq_and_nickname(msg: Message) -> tuple[str | None, str | None]:
-    at_qq = extract_at_qq_from_message(msg)
+def extract_at_qq_and_nickname(event: GroupMessageEvent) -> tuple[str | None, str | None]:
+    at_qq = extract_at_qq_from_message(event.message)
 
     if not at_qq:
         return None, None
 
-    text = msg.extract_plain_text().strip()
-    _, _, nickname_part = text.partition("昵称")
+    _, _, nickname_part = _plain(event).partition("昵称")
     if not nickname_part:
         return at_qq, None
 
@@ -178,114 +481,83 @@ def validate_nickname(nickname: str) -> str | None:
     return None
 
 
-async def nickname_occupied(group_id: str, nickname: str, user_id: str) -> bool:
-    row = await db.fetch_one(
-        """
-        SELECT user_id
-        FROM nicknames
-        WHERE group_id = ? AND nickname = ? AND user_id <> ?
-        LIMIT 1
-        """,
-        (group_id, nickname, user_id),
-    )
-    return row is not None
+# 插入冲突但查询时冲突记录已被删除时重新插入，最多尝试的次数
+ADD_NICKNAME_ATTEMPTS = 2
+# 多次尝试后仍无法确定昵称归属时 add_nickname_record 的返回值
+NICKNAME_CONFLICT_RETRY = ""
 
 
-async def add_nickname_record(group_id: str, user_id: str, nickname: str) -> bool:
-    """添加昵称记录，返回是否成功（False 表示已存在）"""
-    try:
-        await db.execute(
-            """
-            INSERT INTO nicknames (group_id, user_id, nickname)
-            VALUES (?, ?, ?)
-            """,
-            (group_id, user_id, nickname),
-        )
-        await _invalidate_cache(group_id)
-        return True
-    except sqlite3.IntegrityError:
-        return False
+async def add_nickname_record(group_id: str, user_id: str, nickname: str) -> str | None:
+    """添加昵称记录
 
+    Args:
+        group_id: 群号
+        user_id: 要绑定昵称的用户 QQ 号
+        nickname: 昵称
+
+    Returns:
+        绑定成功时返回 None；昵称在群内已被绑定时返回当前持有者的 QQ 号；
+        冲突记录反复在插入与查询之间被删除时返回 NICKNAME_CONFLICT_RETRY
+    """
+    for _ in range(ADD_NICKNAME_ATTEMPTS):
+        inserted = await db.fetch_one(_SQL_INSERT_NICKNAME, (group_id, user_id, nickname))
+        if inserted is not None:
+            _invalidate_cache(group_id)
+            return None
+
+        owner = await db.fetch_one(_SQL_SELECT_NICKNAME_OWNER, (group_id, nickname))
+        if owner is not None:
+            return owner["user_id"]
+        # 冲突记录在两条语句之间被删除，昵称已空出，重新尝试插入
+
+    return NICKNAME_CONFLICT_RETRY
 
-async def fetch_group_nickname_map(group_id: str) -> dict[str, list[str]]:
-    rows = await db.fetch_all(
-        """
-        SELECT user_id, nickname
-        FROM nicknames
-        WHERE group_id = ?
-        """,
-        (group_id,),
-    )
-    mapping: dict[str, list[str]] = defaultdict(list)
-    for row in rows:
-        mapping[row["user_id"]].append(row["nickname"])
-    return mapping
+
+async def fetch_nickname_to_user_map(group_id: str) -> dict[str, str]:
+    """查询群内所有昵称，返回 {nickname: user_id} 映射"""
+    return {
+        row["nickname"]: row["user_id"]
+        async for row in db.fetch_iter(_SQL_SELECT_GROUP_NICKNAMES, (group_id,))
+    }
 
 
 async def fetch_user_nicknames(group_id: str, user_id: str) -> list[str]:
-    rows = await db.fetch_all(
-        """
-        SELECT nickname
-        FROM nicknames
-        WHERE group_id = ? AND user_id = ?
-        ORDER BY nickname
-        """,
-        (group_id, user_id),
-    )
+    rows = await db.fetch_all(_SQL_SELECT_USER_NICKNAMES, (group_id, user_id))
     return [row["nickname"] for row in rows]
 
 
 async def delete_single_nickname(group_id: str, user_id: str, nickname: str) -> bool:
     """删除单个昵称，返回是否成功"""
-    existing = await db.fetch_one(
-        """
-        SELECT 1 FROM nicknames
-        WHERE group_id = ? AND user_id = ? AND nickname = ?
-        LIMIT 1
-        """,
-        (group_id, user_id, nickname),
-    )
+    existing = await db.fetch_one(_SQL_NICKNAME_EXISTS, (group_id, user_id, nickname))
     if not existing:
         return False
 
-    await db.execute(
-        """
-        DELETE FROM nicknames
-        WHERE group_id = ? AND user_id = ? AND nickname = ?
-        """,
-        (group_id, user_id, nickname),
-    )
-    await _invalidate_cache(group_id)
+    await db.execute(_SQL_DELETE_NICKNAME, (group_id, user_id, nickname))
+    _invalidate_cache(group_id)
     return True
 
 
 async def clear_user_nicknames(group_id: str, user_id: str) -> list[str]:
     """清空用户的所有昵称，返回被清空的昵称列表"""
-    nicknames = await fetch_user_nicknames(group_id, user_id)
-    if not nicknames:
-        return []
-
-    await db.execute(
-        """
-        DELETE FROM nicknames
-        WHERE group_id = ? AND user_id = ?
-        """,
-        (group_id, user_id),
-    )
-    await _invalidate_cache(group_id)
+    rows = await db.fetch_all(_SQL_CLEAR_USER_NICKNAMES, (group_id, user_id))
+    # RETURNING 不保证顺序，与 fetch_user_nicknames 一样按昵称排序
+    nicknames = sorted(row["nickname"] for row in rows)
+    if nicknames:
+        _invalidate_cache(group_id)
     return nicknames
 
 
 @add_nickname_matcher.handle()
 async def handle_add_nickname(bot: Bot, event: GroupMessageEvent) -> None:
-    msg = event.message
-    at_qq, nickname = extract_at_qq_and_nickname(msg)
+    at_qq, nickname = extract_at_qq_and_nickname(event)
 
     if not at_qq:
         return
 
+    group_id = _gid(event)
+
     if not nickname:
-        existing = await fetch_user_nicknames(str(event.group_id), at_qq)
+        existing = await fetch_user_nicknames(group_id, at_qq)
         if existing:
             await add_nickname_matcher.finish("该用户的昵称：" + ", ".join(existing))
         else:
@@ -297,16 +569,15 @@ async def handle_add_nickname(bot: Bot, event: GroupMessageEvent) -> None:
         await add_nickname_matcher.finish(error_msg)
         return
 
-    group_id = str(event.group_id)
-
-    if await nickname_occupied(group_id, nickname, at_qq):
-        await add_nickname_matcher.finish(f"昵称'{nickname}'已被其他用户占用！")
-        return
-
-    if await add_nickname_record(group_id, at_qq, nickname):
+    owner = await add_nickname_record(group_id, at_qq, nickname)
+    if owner is None:
         await add_nickname_matcher.finish(f"昵称'{nickname}'成功绑定到用户！")
-    else:
+    elif owner == at_qq:
         await add_nickname_matcher.finish(f"用户已有昵称'{nickname}'！")
+    elif owner == NICKNAME_CONFLICT_RETRY:
+        await add_nickname_matcher.finish(f"昵称'{nickname}'正在被修改，请稍后重试！")
+    else:
+        await add_nickname_matcher.finish(f"昵称'{nickname}'已被其他用户占用！")
 
 
 replace_nickname_matcher = on_message(rule=is_replacing_nickname, priority=10, block=False)
@@ -315,54 +586,55 @@ replace_nickname_matcher = on_message(rule=is_replacing_nickname, priority=10, b
 @replace_nickname_matcher.handle()
 async def handle_replace_nickname(bot: Bot, event: GroupMessageEvent) -> None:
     """处理昵称替换，将 'at昵称' 替换为实际的 @mentions"""
-    group_id = str(event.group_id)
-    nickname_to_qq = await _get_cached_nickname_map(group_id)
+    nickname_to_qq, automaton = await _get_cached_nickname_map(_gid(event))
+    if not nickname_to_qq or automaton is None:
+        return
 
     original_msg = event.message
-    new_msg = Message()
-    replaced = False
+    # 第一遍只计算替换位置，确认至少有一处昵称可以替换后才重建消息
+    mentions = [
+        find_nickname_mentions(seg.data["text"], nickname_to_qq, automaton)
+        if seg.type == "text"
+        else []
+        for seg in original_msg
+    ]
+    if not any(mentions):
+        return
 
-    for seg in original_msg:
-        if seg.type != "text":
+    new_msg = Message()
+    for seg, spans in zip(original_msg, mentions, strict=True):
+        if not spans:
             new_msg.append(seg)
             continue
 
         text = seg.data["text"]
-        parts = []
         last_pos = 0
-
-        for match in AT_NICKNAME_PATTERN.finditer(text):
-            start, end = match.span()
+        for start, end, qq in spans:
             if start > last_pos:
-                parts.append(MessageSegment.text(text[last_pos:start]))
-            nickname = match.group(1)
-            qq = nickname_to_qq.get(nickname)
-            if qq:
-                parts.append(MessageSegment.at(qq))
-                replaced = True
-            else:
-                parts.append(MessageSegment.text(match.group()))
+                new_msg.append(MessageSegment.text(text[last_pos:start]))
+            new_msg.append(MessageSegment.at(qq))
             last_pos = end
 
         if last_pos < len(text):
-            parts.append(MessageSegment.text(text[last_pos:]))
+            new_msg.append(MessageSegment.text(text[last_pos:]))
 
-        new_msg.extend(parts)
-
-    if replaced:
-        await bot.send(event, new_msg)
+    await bot.send(event, new_msg)
 
 
 def is_deleting_nickname(event: GroupMessageEvent) -> bool:
-    msg = event.message
-    text = msg.extract_plain_text().strip()
-    return text.startswith(("删除昵称", "移除昵称")) and any(seg.type == "at" for seg in msg)
+    return (
+        _has_literal(event, _COMMAND_KEYWORD)
+        and _has_at(event)
+        and _plain(event).startswith(DELETE_COMMAND_PREFIXES)
+    )
 
 
 def is_clearing_nickname(event: GroupMessageEvent) -> bool:
-    msg = event.message
-    text = msg.extract_plain_text().strip()
-    return text.startswith(("清空昵称", "清除昵称")) and any(seg.type == "at" for seg in msg)
+    return (
+        _has_literal(event, _COMMAND_KEYWORD)
+        and _has_at(event)
+        and _plain(event).startswith(("清空昵称", "清除昵称"))
+    )
 
 
 delete_nickname_matcher = on_message(rule=is_deleting_nickname, priority=5, block=True)
@@ -372,17 +644,31 @@ clear_nickname_matcher = on_message(
 
 
 def parse_delete_command(text: str) -> list[str] | None:
-    command_match = re.match(r"^(删除昵称|移除昵称)\s+(.+)$", text)
-    if not command_match:
-        return None
+    """解析删除昵称命令，返回要删除的昵称列表
 
-    nickname_part = command_match.group(2).strip()
-    nickname_part = re.sub(r"@\d+", "", nickname_part).strip()
+    单次扫描完成：去掉命令前缀（其后必须跟空白）、按空白切分，并丢弃手动输入的
+    整词 @QQ号（如 "@123456"）。昵称只能由汉字、字母和数字组成，夹在词中的 @ 不做处理。
 
-    if not nickname_part:
+    Args:
+        text: 去除首尾空白后的消息纯文本
+
+    Returns:
+        昵称列表；不是删除命令或未指定昵称时返回 None
+    """
+    for prefix in DELETE_COMMAND_PREFIXES:
+        if text.startswith(prefix):
+            rest = text[len(prefix) :]
+            break
+    else:
         return None
 
-    return [n.strip() for n in nickname_part.split() if n.strip()]
+    if not rest[:1].isspace():
+        return None
+
+    nicknames = [
+        token for token in rest.split() if not (token.startswith("@") and token[1:].isdigit())
+    ]
+    return nicknames or None
 
 
 def _dedupe_preserve_order(items: list[str]) -> list[str]:
@@ -399,32 +685,34 @@ def _dedupe_preserve_order(items: list[str]) -> list[str]:
 async def delete_nicknames_from_data(
     group_id: str, at_qq: str, nicknames: list[str]
 ) -> tuple[list[str], list[str]]:
-    """批量删除昵称，返回 (成功列表, 不存在列表)"""
+    """批量删除昵称，返回 (成功列表, 不存在列表)
+
+    无论分成多少批执行，缓存都只在全部删除完成后清除一次。
+    """
     if not nicknames:
         return [], []
 
     # 去重并保持原有顺序，避免冗余 SQL 和重复结果
     unique_nicknames = _dedupe_preserve_order(nicknames)
 
-    placeholders = ",".join("?" * len(unique_nicknames))
-    rows = await db.fetch_all(
-        f"SELECT nickname FROM nicknames "  # noqa: S608
-        f"WHERE group_id = ? AND user_id = ? AND nickname IN ({placeholders})",
-        (group_id, at_qq, *unique_nicknames),
-    )
-    existing_set = {row["nickname"] for row in rows}
+    deleted: set[str] = set()
+    if len(unique_nicknames) <= MAX_DELETE_BATCH:
+        # 常见情况：一条语句删除全部昵称
+        rows = await db.fetch_all(
+            _delete_nicknames_sql(len(unique_nicknames)), (group_id, at_qq, *unique_nicknames)
+        )
+        deleted.update(row["nickname"] for row in rows)
+    else:
+        for start in range(0, len(unique_nicknames), MAX_DELETE_BATCH):
+            chunk = unique_nicknames[start : start + MAX_DELETE_BATCH]
+            rows = await db.fetch_all(_delete_nicknames_sql(len(chunk)), (group_id, at_qq, *chunk))
+            deleted.update(row["nickname"] for row in rows)
 
-    success = [n for n in unique_nicknames if n in existing_set]
-    not_found = [n for n in unique_nicknames if n not in existing_set]
+    success = [n for n in unique_nicknames if n in deleted]
+    not_found = [n for n in unique_nicknames if n not in deleted]
 
-    if success:
-        delete_placeholders = ",".join("?" * len(success))
-        await db.execute(
-            f"DELETE FROM nicknames "  # noqa: S608
-            f"WHERE group_id = ? AND user_id = ? AND nickname IN ({delete_placeholders})",
-            (group_id, at_qq, *success),
-        )
-        await _invalidate_cache(group_id)
+    if deleted:
+        _invalidate_cache(group_id)
 
     return success, not_found
 
@@ -441,20 +729,17 @@ def build_delete_reply(success: list[str], not_found: list[str]) -> str:
 
 @delete_nickname_matcher.handle()
 async def handle_delete_nickname(bot: Bot, event: GroupMessageEvent) -> None:
-    msg = event.message
-    text = msg.extract_plain_text().strip()
-
-    at_qq = extract_at_qq_from_message(msg)
+    at_qq = extract_at_qq_from_message(event.message)
     if not at_qq:
         await delete_nickname_matcher.finish("请@要删除昵称的用户")
         return
 
-    nicknames = parse_delete_command(text)
+    nicknames = parse_delete_command(_plain(event))
     if not nicknames:
         await delete_nickname_matcher.finish("请指定要删除的昵称")
         return
 
-    group_id = str(event.group_id)
+    group_id = _gid(event)
 
     user_nicknames = await fetch_user_nicknames(group_id, at_qq)
     if not user_nicknames:
@@ -475,7 +760,7 @@ async def handle_clear_nickname(bot: Bot, event: GroupMessageEvent) -> None:
         await clear_nickname_matcher.finish("请@要清空昵称的用户")
         return
 
-    group_id = str(event.group_id)
+    group_id = _gid(event)
 
     cleared_nicknames = await clear_user_nicknames(group_id, at_qq)
     if not cleared_nicknames:
@@ -485,6 +770,21 @@ async def handle_clear_nickname(bot: Bot, event: GroupMessageEvent) -> None:
     await clear_nickname_matcher.finish(f"已清空该用户的所有昵称：{', '.join(cleared_nicknames)}")
 
 
+cache_info_matcher = on_fullmatch("昵称缓存状态", permission=SUPERUSER, priority=5, block=True)
+
+
+@cache_info_matcher.handle()
+async def handle_cache_info() -> None:
+    """查看昵称缓存的命中情况（仅超级用户）"""
+    info = _nickname_cache.cache_info()
+    total = info.hits + info.misses
+    hit_rate = info.hits / total if total else 0.0
+    await cache_info_matcher.finish(
+        f"昵称缓存：已缓存 {info.currsize}/{info.maxsize} 个群，"
+        f"命中 {info.hits} 次，未命中 {info.misses} 次，命中率 {hit_rate:.1%}"
+    )
+
+
 def is_group_decrease_event(event: Event) -> bool:
     """检查是否为群成员减少事件"""
     return isinstance(event, GroupDecreaseNoticeEvent)
@@ -510,3 +810,74 @@ async def handle_group_decrease(bot: Bot, event: GroupDecreaseNoticeEvent) -> No
         logger.info(
             f"用户 {user_id} 退出群 {group_id}，已自动清理其昵称: {', '.join(cleared_nicknames)}"
         )
+
+
+@driver.on_startup
+async def init_nickname_storage() -> None:
+    """启动时建表、迁移唯一索引并预热昵称缓存"""
+    await db.execute_batch((statement, None) for statement in NICKNAME_SCHEMA)
+    await migrate_nickname_unique_index()
+    await warm_up_nickname_cache()
+
+
+async def migrate_nickname_unique_index() -> None:
+    """为昵称表建立 (group_id, nickname) 唯一索引（仅在索引不存在时执行一次）
+
+    旧版本只有普通索引，库中可能存在同一群内同一昵称绑定给多个用户的记录。
+    每组重复记录保留最早写入的一条，其余逐条记录警告日志后删除；
+    删除与建索引在同一事务内完成，任一步失败都会整体回滚，下次启动重试。
+    """
+    if await db.fetch_one(_SQL_INDEX_EXISTS, (NICKNAME_UNIQUE_INDEX,)) is not None:
+        return
+
+    operations: list[tuple[str, tuple[int] | None]] = []
+    # (group_id, nickname) -> 保留记录的 user_id
+    kept: dict[tuple[str, str], str] = {}
+    for row in await db.fetch_all(_SQL_SELECT_DUPLICATE_NICKNAMES):
+        group_id, nickname, user_id = row["group_id"], row["nickname"], row["user_id"]
+        key = (group_id, nickname)
+        if key not in kept:
+            kept[key] = user_id
+            continue
+        logger.warning(
+            f"群 {group_id} 的昵称'{nickname}'重复绑定：保留用户 {kept[key]}，"
+            f"移除用户 {user_id} 的绑定"
+        )
+        operations.append((_SQL_DELETE_NICKNAME_BY_ROWID, (row["row_id"],)))
+
+    removed = len(operations)
+    operations.extend((statement, None) for statement in NICKNAME_UNIQUE_INDEX_MIGRATION)
+    await db.execute_batch(operations)
+    logger.info(f"已创建昵称唯一索引 {NICKNAME_UNIQUE_INDEX}，清理重复绑定 {removed} 条")
+
+
+async def _iter_warm_up_groups() -> AsyncIterator[tuple[str, dict[str, str]]]:
+    """流式读取预热查询，每读完一个群产出一次 (group_id, {nickname: user_id})"""
+    group_id = ""
+    nickname_to_qq: dict[str, str] = {}
+    async for row in db.fetch_iter(_SQL_SELECT_WARM_UP_NICKNAMES, (CACHE_MAXSIZE,)):
+        # 查询按群号排序，群号变化说明上一个群的昵称已读完
+        if row["group_id"] != group_id and nickname_to_qq:
+            yield group_id, nickname_to_qq
+            nickname_to_qq = {}
+        group_id = row["group_id"]
+        nickname_to_qq[row["nickname"]] = row["user_id"]
+    if nickname_to_qq:
+        yield group_id, nickname_to_qq
+
+
+async def warm_up_nickname_cache() -> None:
+    """启动时预热昵称数最多的 CACHE_MAXSIZE 个群的昵称缓存
+
+    昵称表不记录使用时间，以群内绑定的昵称数近似群的活跃度，在 SQL 中排序并截取；
+    查询结果逐群流式读取并立即写入缓存，不会把整张表载入内存。
+    其余群仍在首次使用时按需加载。
+    """
+    generation = _nickname_cache.generation()
+    expires_at = time() + CACHE_TTL
+    warmed = 0
+    async for group_id, nickname_to_qq in _iter_warm_up_groups():
+        entry = (expires_at, nickname_to_qq, build_nickname_automaton(nickname_to_qq))
+        _nickname_cache.put(group_id, entry, generation)
+        warmed += 1
+    logger.debug(f"已预热 {warmed} 个群组的昵称缓存")
@@ -1,5 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class Config(BaseModel):
     max_nickname_length: int = 15  # 最大昵称长度限制
+    # 单条 SQL 最多可绑定的参数数量，批量删除超过该数量时分批执行；
+    # 实际生效值不会超过运行时 SQLite 版本支持的上限
+    sqlite_max_variable_number: int = Field(default=32766, ge=3, le=32766)
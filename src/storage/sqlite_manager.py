@@ -4,10 +4,13 @@ from __future__ import annotations
 
 import asyncio
 import sqlite3
-from collections.abc import Iterable, Sequence
+from collections.abc import AsyncIterator, Iterable, Sequence
 from pathlib import Path
 from typing import Any
 
+STATEMENT_CACHE_SIZE = 256
+FETCH_ITER_BATCH_SIZE = 256
+
 
 class SQLiteManager:
     """Serialize SQLite access across async code paths."""
@@ -18,9 +21,14 @@ class SQLiteManager:
         self._db_path = db_path
         self._db_path.parent.mkdir(parents=True, exist_ok=True)
 
-        self._conn = sqlite3.connect(self._db_path, check_same_thread=False)
+        # 插件的热路径 SQL 均为固定字符串，调大预编译语句缓存以免相互挤出
+        self._conn = sqlite3.connect(
+            self._db_path, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE
+        )
         self._conn.row_factory = sqlite3.Row
         self._conn.execute("PRAGMA journal_mode=WAL;")
+        self._conn.execute("PRAGMA synchronous=NORMAL;")
+        self._conn.execute("PRAGMA temp_store=MEMORY;")
         self._conn.execute("PRAGMA foreign_keys=ON;")
 
         self._lock = asyncio.Lock()
@@ -45,6 +53,37 @@ class SQLiteManager:
         result = await self._run(sql, params, fetch_kind="all")
         return result if result is not None else []
 
+    async def fetch_iter(
+        self,
+        sql: str,
+        params: Sequence[Any] | None = None,
+        batch_size: int = FETCH_ITER_BATCH_SIZE,
+    ) -> AsyncIterator[sqlite3.Row]:
+        """Yield query rows batch by batch instead of materializing the full result.
+
+        The manager lock is held until the iterator is exhausted or closed, so
+        consume it promptly; wrap it in ``contextlib.aclosing`` when breaking early.
+        """
+        args = tuple(params) if params is not None else ()
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            cursor = await loop.run_in_executor(None, self._conn.execute, sql, args)
+            try:
+                while rows := await loop.run_in_executor(None, cursor.fetchmany, batch_size):
+                    for row in rows:
+                        yield row
+            finally:
+                cursor.close()
+
+    async def execute_batch(self, operations: Iterable[tuple[str, Sequence[Any] | None]]) -> None:
+        """Run several statements inside a single transaction."""
+        batch = [(sql, tuple(params) if params is not None else ()) for sql, params in operations]
+        if not batch:
+            return
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            await loop.run_in_executor(None, self._execute_batch_sync, batch)
+
     async def close(self) -> None:
         async with self._lock:
             self._conn.close()
@@ -67,6 +106,14 @@ class SQLiteManager:
         self._conn.commit()
         return result
 
+    def _execute_batch_sync(self, batch: list[tuple[str, tuple[Any, ...]]]) -> None:
+        with self._conn:
+            # sqlite3 only opens implicit transactions before DML; begin explicitly so
+            # schema statements in the batch are committed or rolled back together.
+            self._conn.execute("BEGIN")
+            for sql, params in batch:
+                self._conn.execute(sql, params)
+
 
 def get_db() -> SQLiteManager:
     """Return the singleton SQLite manager instance."""
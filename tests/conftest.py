@@ -11,11 +11,33 @@ def pytest_configure(config: pytest.Config) -> None:
 
 
 @pytest.fixture(scope="session", autouse=True)
-async def load_plugins(_nonebot_init: None):
+async def load_plugins(_nonebot_init: None, tmp_path_factory: pytest.TempPathFactory):
     """在 NoneBot 初始化后自动加载插件"""
     from nonebot import load_plugin
 
+    from src.storage.sqlite_manager import SQLiteManager
+
+    # 插件导入时即会连接数据库，测试中改用临时目录，避免写入项目 data/ 目录
+    SQLiteManager._instance = SQLiteManager(tmp_path_factory.mktemp("data") / "kiana.sqlite3")
+
     load_plugin("src.plugins.fund")
+    load_plugin("src.plugins.un_nickname")
+
+
+@pytest.fixture(scope="session")
+def fund_mod(load_plugins: None):
+    """插件加载后的 fund 模块，整个测试会话只解析一次"""
+    import src.plugins.fund as module
+
+    return module
+
+
+@pytest.fixture(scope="session")
+def un_nickname_mod(load_plugins: None):
+    """插件加载后的 un_nickname 模块，数据库为会话级临时库"""
+    import src.plugins.un_nickname as module
+
+    return module
 
 
 @pytest_asyncio.fixture
@@ -28,3 +50,89 @@ async def fund_plugin():
         pytest.skip("fund 插件未加载")
 
     return plugin
+
+
+# 基金 002170 模拟数据（mock_fund_002170_data）经 format_fund_info 格式化后的基准输出
+EXPECTED_002170 = """东吴移动互联混合C
+代码: 002170
+
+最近交易日收益:
+2024-01-03: +1.20%
+2024-01-02: -0.30%
+2024-01-01: +0.50%
+
+阶段收益:
+近1月: 5.20%
+近3月: -2.10%
+近6月: 8.70%
+近1年: 15.30%"""
+
+
+@pytest.fixture(scope="module")
+def mock_fund_002170_data() -> dict:
+    """基金 002170 的模拟数据，每个模块只构造一次 DataFrame（测试只读不改）"""
+    import pandas as pd
+
+    basic_info_df = pd.DataFrame(
+        {
+            "item": pd.array(["基金名称", "基金代码", "基金类型"], dtype="string"),
+            "value": pd.array(["东吴移动互联混合C", "002170", "混合型"], dtype="string"),
+        }
+    )
+
+    # 业绩数据
+    achievement_df = pd.DataFrame(
+        {
+            "周期": pd.array(["近1月", "近3月", "近6月", "近1年"], dtype="string"),
+            "本产品区间收益": pd.array([5.2, -2.1, 8.7, 15.3], dtype="float64"),
+        }
+    )
+
+    # 净值数据
+    nav_df = pd.DataFrame(
+        {
+            "净值日期": pd.array(["2024-01-01", "2024-01-02", "2024-01-03"], dtype="string"),
+            "日增长率": pd.array([0.5, -0.3, 1.2], dtype="float64"),
+        }
+    )
+
+    return {
+        "basic_info": basic_info_df,
+        "achievement": achievement_df,
+        "nav": nav_df,
+        "success": True,
+    }
+
+
+@pytest.fixture(scope="module")
+def mock_fund_structure_data() -> dict:
+    """用于校验输出结构的最小基金模拟数据，每个模块只构造一次"""
+    import pandas as pd
+
+    basic_info_df = pd.DataFrame(
+        {
+            "item": pd.array(["基金名称", "基金代码"], dtype="string"),
+            "value": pd.array(["测试基金", "TEST001"], dtype="string"),
+        }
+    )
+
+    achievement_df = pd.DataFrame(
+        {
+            "周期": pd.array(["近1月", "近3月"], dtype="string"),
+            "本产品区间收益": pd.array([1.0, 2.0], dtype="float64"),
+        }
+    )
+
+    nav_df = pd.DataFrame(
+        {
+            "净值日期": pd.array(["2024-01-01", "2024-01-02"], dtype="string"),
+            "日增长率": pd.array([0.1, 0.2], dtype="float64"),
+        }
+    )
+
+    return {
+        "basic_info": basic_info_df,
+        "achievement": achievement_df,
+        "nav": nav_df,
+        "success": True,
+    }
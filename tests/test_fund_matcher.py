@@ -1,11 +1,19 @@
 """测试 fund 插件的 matcher 行为"""
 
 import pytest
+import pytest_asyncio
 from datetime import datetime
 from nonebug import App
 from nonebot.adapters.onebot.v11 import Bot, Message, GroupMessageEvent
+from nonebot.adapters.onebot.v11.event import Sender
 from unittest.mock import patch
 
+from tests.conftest import EXPECTED_002170
+
+
+# 测试用的发送者信息，模块加载时校验一次，之后直接复用
+FAKE_SENDER = Sender(user_id=123456, nickname="测试用户", card="", role="member")
+
 
 def create_fake_group_message_event(
     message: str,
@@ -13,8 +21,17 @@ def create_fake_group_message_event(
     group_id: int = 654321,
     self_id: int = 987654321,
 ) -> GroupMessageEvent:
-    """创建假的群消息事件用于测试"""
-    return GroupMessageEvent(
+    """创建假的群消息事件用于测试
+
+    测试数据本身合法，使用 model_construct 跳过 pydantic 校验；
+    适配器会原地修改 event.message（去除 @ 与昵称），因此每个字段各自构造新的 Message
+    """
+    sender = (
+        FAKE_SENDER
+        if user_id == FAKE_SENDER.user_id
+        else FAKE_SENDER.model_copy(update={"user_id": user_id})
+    )
+    return GroupMessageEvent.model_construct(
         time=int(datetime.now().timestamp()),
         self_id=self_id,
         post_type="message",
@@ -27,33 +44,34 @@ def create_fake_group_message_event(
         original_message=Message(message),
         raw_message=message,
         font=0,
-        sender={
-            "user_id": user_id,
-            "nickname": "测试用户",
-            "card": "",
-            "role": "member",
-        },
+        sender=sender,
     )
 
 
-@pytest.mark.asyncio
-async def test_fund_query_matcher_regex_match(app: App):
-    """测试 fund_query matcher 的正则匹配"""
-    from src.plugins.fund import fund_query
-    from nonebot.adapters.onebot.v11 import Bot as OneBotV11Bot
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def shared_bot(nonebug_init: None):
+    """模块内共享的 Bot，供只直接调用 rule、不走 matcher 处理流程的测试复用
 
+    不注册到驱动（auto_connect=False），以免与各测试中同 self_id 的 Bot 冲突
+    """
+    app = App()
     async with app.test_api() as ctx:
-        bot = ctx.create_bot(base=OneBotV11Bot, self_id="987654321")
-        event = create_fake_group_message_event("002170")
+        yield ctx.create_bot(base=Bot, self_id="987654321", auto_connect=False)
 
-        result = await fund_query.rule(bot, event, {})
-        assert result is True
+
+@pytest.mark.asyncio
+async def test_fund_query_matcher_regex_match(shared_bot: Bot, fund_mod):
+    """测试 fund_query matcher 的正则匹配"""
+    event = create_fake_group_message_event("002170")
+
+    result = await fund_mod.fund_query.rule(shared_bot, event, {})
+    assert result is True
 
 
 @pytest.mark.asyncio
-async def test_fund_query_matcher_regex_not_match(app: App):
+async def test_fund_query_matcher_regex_not_match(app: App, fund_mod):
     """测试不匹配正则的消息"""
-    from src.plugins.fund import fund_query
+    fund_query = fund_mod.fund_query
 
     async with app.test_matcher(fund_query) as ctx:
         bot = ctx.create_bot(base=Bot, self_id="987654321")
@@ -64,9 +82,9 @@ async def test_fund_query_matcher_regex_not_match(app: App):
 
 
 @pytest.mark.asyncio
-async def test_fund_query_matcher_etf_code(app: App):
+async def test_fund_query_matcher_etf_code(app: App, fund_mod):
     """测试 ETF 代码的正则匹配"""
-    from src.plugins.fund import fund_query
+    fund_query = fund_mod.fund_query
 
     async with app.test_matcher(fund_query) as ctx:
         bot = ctx.create_bot(base=Bot, self_id="987654321")
@@ -77,29 +95,25 @@ async def test_fund_query_matcher_etf_code(app: App):
 
 
 @pytest.mark.asyncio
-async def test_fund_query_matcher_stock_code_with_suffix(app: App):
+async def test_fund_query_matcher_stock_code_with_suffix(shared_bot: Bot, fund_mod):
     """测试带交易所后缀的股票代码匹配"""
-    from src.plugins.fund import fund_query
-    from nonebot.adapters.onebot.v11 import Bot as OneBotV11Bot
-
-    async with app.test_api() as ctx:
-        bot = ctx.create_bot(base=OneBotV11Bot, self_id="987654321")
+    fund_query = fund_mod.fund_query
 
-        # 测试深圳股票代码
-        event = create_fake_group_message_event("000001.SZ")
-        result = await fund_query.rule(bot, event, {})
-        assert result is True
+    # 测试深圳股票代码
+    event = create_fake_group_message_event("000001.SZ")
+    result = await fund_query.rule(shared_bot, event, {})
+    assert result is True
 
-        # 测试上海股票代码
-        event2 = create_fake_group_message_event("600000.SH")
-        result2 = await fund_query.rule(bot, event2, {})
-        assert result2 is True
+    # 测试上海股票代码
+    event2 = create_fake_group_message_event("600000.SH")
+    result2 = await fund_query.rule(shared_bot, event2, {})
+    assert result2 is True
 
 
 @pytest.mark.asyncio
-async def test_fund_query_matcher_beijing_stock(app: App):
+async def test_fund_query_matcher_beijing_stock(app: App, fund_mod):
     """测试北交所股票代码匹配"""
-    from src.plugins.fund import fund_query
+    fund_query = fund_mod.fund_query
 
     async with app.test_matcher(fund_query) as ctx:
         bot = ctx.create_bot(base=Bot, self_id="987654321")
@@ -110,27 +124,12 @@ async def test_fund_query_matcher_beijing_stock(app: App):
 
 
 @pytest.mark.asyncio
-async def test_fund_query_handler_with_mocked_data(app: App):
+async def test_fund_query_handler_with_mocked_data(app: App, fund_mod):
     """测试 fund_query handler 的完整流程"""
-    from src.plugins.fund import fund_query
-
-    # 准备期望的返回文本
-    expected_info_text = """东吴移动互联混合C
-代码: 002170
-
-最近交易日收益:
-2024-01-03: +1.20%
-2024-01-02: -0.30%
-2024-01-01: +0.50%
-
-阶段收益:
-近1月: 5.20%
-近3月: -2.10%
-近6月: 8.70%
-近1年: 15.30%"""
+    fund_query = fund_mod.fund_query
 
     with patch("src.plugins.fund.query_by_code_type") as mock_query:
-        mock_query.return_value = (expected_info_text, None)
+        mock_query.return_value = (EXPECTED_002170, None)
 
         async with app.test_matcher(fund_query) as ctx:
             bot = ctx.create_bot(base=Bot, self_id="987654321")
@@ -147,7 +146,7 @@ async def test_fund_query_handler_with_mocked_data(app: App):
                     "messages": [
                         {
                             "type": "node",
-                            "data": {"name": "", "uin": "987654321", "content": expected_info_text},
+                            "data": {"name": "", "uin": "987654321", "content": EXPECTED_002170},
                         }
                     ],
                 },
@@ -156,9 +155,10 @@ async def test_fund_query_handler_with_mocked_data(app: App):
 
 
 @pytest.mark.asyncio
-async def test_fund_query_handler_with_unknown_code(app: App):
+async def test_fund_query_handler_with_unknown_code(app: App, fund_mod):
     """测试未知代码类型的处理（静默失败）"""
-    from src.plugins.fund import fund_query, identify_code_type, CodeType
+    fund_query = fund_mod.fund_query
+    CodeType = fund_mod.CodeType
 
     async with app.test_matcher(fund_query) as ctx:
         bot = ctx.create_bot(base=Bot, self_id="987654321")
@@ -177,9 +177,9 @@ async def test_fund_query_handler_with_unknown_code(app: App):
 
 
 @pytest.mark.asyncio
-async def test_fund_query_handler_with_private_message(app: App):
+async def test_fund_query_handler_with_private_message(app: App, fund_mod):
     """测试私聊消息的处理"""
-    from src.plugins.fund import fund_query
+    fund_query = fund_mod.fund_query
     from nonebot.adapters.onebot.v11 import PrivateMessageEvent
 
     expected_info_text = "测试基金信息"
@@ -231,9 +231,9 @@ async def test_fund_query_handler_with_private_message(app: App):
 
 
 @pytest.mark.asyncio
-async def test_fund_query_multiple_codes(app: App):
+async def test_fund_query_multiple_codes(app: App, fund_mod):
     """测试多个不同类型的代码"""
-    from src.plugins.fund import fund_query
+    fund_query = fund_mod.fund_query
 
     test_cases = [
         ("002170", "场外基金"),
@@ -241,12 +241,16 @@ async def test_fund_query_multiple_codes(app: App):
         ("000001.SZ", "股票"),
     ]
 
-    for code, expected_type in test_cases:
-        with patch("src.plugins.fund.query_by_code_type") as mock_query:
-            mock_query.return_value = (f"{expected_type}信息", None)
+    expected_texts = {code: f"{expected_type}信息" for code, expected_type in test_cases}
+
+    # 同一个 matcher 上下文中依次投递多个事件，只创建一次 Bot
+    with patch("src.plugins.fund.query_by_code_type") as mock_query:
+        mock_query.side_effect = lambda code, code_type: (expected_texts[code], None)
+
+        async with app.test_matcher(fund_query) as ctx:
+            bot = ctx.create_bot(base=Bot, self_id="987654321")
 
-            async with app.test_matcher(fund_query) as ctx:
-                bot = ctx.create_bot(base=Bot, self_id="987654321")
+            for code, expected_text in expected_texts.items():
                 event = create_fake_group_message_event(code)
 
                 ctx.receive_event(bot, event)
@@ -262,7 +266,7 @@ async def test_fund_query_multiple_codes(app: App):
                                 "data": {
                                     "name": "",
                                     "uin": "987654321",
-                                    "content": f"{expected_type}信息",
+                                    "content": expected_text,
                                 },
                             }
                         ],
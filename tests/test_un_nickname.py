@@ -0,0 +1,487 @@
+import asyncio
+
+import pytest
+
+
+def test_nickname_automaton_prefilter_never_misses_regex_match(un_nickname_mod):
+    """自动机预扫描为 False 时，正则路径也不应替换出任何昵称"""
+    nickname_to_qq = {"张三": "10001", "三": "10002", "kiana": "10003", "at张三": "10004"}
+    automaton = un_nickname_mod.build_nickname_automaton(nickname_to_qq)
+    assert automaton is not None
+
+    texts = [
+        "at张三",
+        "at 张三 你好",
+        "hello atkiana",
+        "at张三丰",
+        "atat张三",
+        "at at张三",
+        "你at张三",
+        "at李四 at王五",
+        "没有关键字",
+        "at",
+    ]
+    for text in texts:
+        regex_hit = any(
+            match.group(1) in nickname_to_qq
+            for match in un_nickname_mod.AT_NICKNAME_PATTERN.finditer(text)
+        )
+        if regex_hit:
+            assert un_nickname_mod.contains_any_nickname(automaton, text), f"预扫描漏判: {text!r}"
+
+    assert not un_nickname_mod.contains_any_nickname(automaton, "at李四 at王五")
+
+
+def test_build_nickname_automaton_empty(un_nickname_mod):
+    """没有任何昵称时不构建自动机"""
+    assert un_nickname_mod.build_nickname_automaton([]) is None
+
+
+def test_is_valid_nickname_matches_reference_pattern(un_nickname_mod):
+    """快速路径与正则参考实现的判定保持一致"""
+    samples = [
+        "",
+        "kiana",
+        "Kiana123",
+        "张三",
+        "张三abc9",
+        "a_b",
+        "a b",
+        "é",
+        "１２３",
+        "䷿",
+        "一",
+        "龥",
+        "龦",
+        "昵称!",
+        "😀",
+    ]
+    for nickname in samples:
+        expected = bool(un_nickname_mod.VALID_NICKNAME_PATTERN.match(nickname))
+        assert un_nickname_mod.is_valid_nickname(nickname) == expected, f"判定不一致: {nickname!r}"
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("删除昵称 张三", ["张三"]),
+        ("移除昵称 张三  李四", ["张三", "李四"]),
+        ("删除昵称 @123456 张三", ["张三"]),
+        ("删除昵称 张@123三", ["张@123三"]),
+        ("删除昵称 @abc 张三", ["@abc", "张三"]),
+        ("删除昵称\n张三", ["张三"]),
+        ("删除昵称张三", None),
+        ("删除昵称 @123456", None),
+        ("清空昵称 张三", None),
+        ("删除昵称", None),
+    ],
+)
+def test_parse_delete_command(un_nickname_mod, text, expected):
+    """删除命令解析：前缀后必须有空白，并忽略手动输入的 @QQ号"""
+    assert un_nickname_mod.parse_delete_command(text) == expected
+
+
+def _entry(un_nickname_mod, nickname_to_qq: dict[str, str], ttl: float = 60.0):
+    """构造未过期的缓存条目"""
+    automaton = un_nickname_mod.build_nickname_automaton(nickname_to_qq)
+    return (un_nickname_mod.time() + ttl, nickname_to_qq, automaton)
+
+
+@pytest.fixture
+async def nickname_storage(un_nickname_mod):
+    """执行启动钩子，确保昵称表与唯一索引存在"""
+    await un_nickname_mod.init_nickname_storage()
+    return un_nickname_mod
+
+
+def test_nick_cache_evicts_least_frequently_used(un_nickname_mod):
+    """容量满时淘汰访问次数最少的群"""
+    cache = un_nickname_mod._NickCache(2)
+    cache.put("a", _entry(un_nickname_mod, {"甲": "1"}), 0)
+    cache.put("b", _entry(un_nickname_mod, {"乙": "2"}), 0)
+    cache.get("a")
+    cache.get("a")
+
+    cache.put("c", _entry(un_nickname_mod, {"丙": "3"}), 0)
+
+    assert cache.peek("a") is not None
+    assert cache.peek("b") is None
+    assert cache.peek("c") is not None
+
+
+def test_nick_cache_evicts_expired_before_frequent(un_nickname_mod):
+    """已失效的条目即使访问次数最多也优先淘汰"""
+    cache = un_nickname_mod._NickCache(2)
+    cache.put("a", _entry(un_nickname_mod, {"甲": "1"}), 0)
+    cache.put("b", _entry(un_nickname_mod, {"乙": "2"}), 0)
+    for _ in range(3):
+        cache.get("a")
+    cache.invalidate("a")
+
+    cache.put("c", _entry(un_nickname_mod, {"丙": "3"}), 0)
+
+    assert cache.cache_info().currsize == 2
+    assert cache.peek("b") is not None
+    assert cache.peek("c") is not None
+
+
+def test_nick_cache_ttl_expiry(un_nickname_mod, monkeypatch: pytest.MonkeyPatch):
+    """超过 TTL 的条目不再命中"""
+    cache = un_nickname_mod._NickCache(4)
+    cache.put("a", _entry(un_nickname_mod, {"甲": "1"}, ttl=10), 0)
+    assert cache.get("a") is not None
+
+    now = un_nickname_mod.time()
+    monkeypatch.setattr(un_nickname_mod, "time", lambda: now + 11)
+
+    assert cache.get("a") is None
+    assert cache.cache_info().hits == 1
+    assert cache.cache_info().misses == 1
+
+
+def test_nick_cache_new_entry_survives_tie_with_older_entry(un_nickname_mod):
+    """新条目从 1 开始计数，与旧条目次数相同时淘汰最久未访问的旧条目"""
+    cache = un_nickname_mod._NickCache(2)
+    cache.put("a", _entry(un_nickname_mod, {"甲": "1"}), 0)
+    cache.put("b", _entry(un_nickname_mod, {"乙": "2"}), 0)
+    cache.get("a")
+    cache.get("b")
+
+    # a、b 次数相同，a 最久未访问
+    cache.put("c", _entry(un_nickname_mod, {"丙": "3"}), 0)
+    assert cache.peek("a") is None
+
+    # 刚加载的 c 与 b 次数相同，淘汰更早访问的 b
+    cache.put("d", _entry(un_nickname_mod, {"丁": "4"}), 0)
+    assert cache.peek("b") is None
+    assert cache.peek("c") is not None
+    assert cache.peek("d") is not None
+
+
+def test_nick_cache_discards_stale_put_per_group(un_nickname_mod):
+    """回源期间本群失效则丢弃写入，其他群的失效不影响本群写入"""
+    cache = un_nickname_mod._NickCache(4)
+    generation = cache.generation()
+
+    cache.invalidate("a")
+    cache.put("a", _entry(un_nickname_mod, {"甲": "1"}), generation)
+    cache.put("b", _entry(un_nickname_mod, {"乙": "2"}), generation)
+
+    assert cache.peek("a") is None
+    assert cache.peek("b") is not None
+
+    cache.put("a", _entry(un_nickname_mod, {"甲": "1"}), cache.generation())
+    cache.invalidate("b")
+    assert cache.peek("a") is not None
+    assert cache.peek("b") is None
+
+
+def test_nick_cache_invalidation_records_are_bounded(un_nickname_mod):
+    """失效记录不超过 maxsize 条；被丢弃记录之前开始的回源保守地放弃写入"""
+    cache = un_nickname_mod._NickCache(2)
+    generation = cache.generation()
+
+    for group_id in ("a", "b", "c", "d"):
+        cache.invalidate(group_id)
+    assert len(cache._invalidated_at) == 2
+
+    # a 的失效记录已被丢弃，仍不能写入失效前开始回源的旧数据
+    cache.put("a", _entry(un_nickname_mod, {"甲": "1"}), generation)
+    assert cache.peek("a") is None
+
+    cache.put("a", _entry(un_nickname_mod, {"甲": "1"}), cache.generation())
+    assert cache.peek("a") is not None
+
+
+async def test_concurrent_cache_misses_share_one_load(
+    un_nickname_mod, monkeypatch: pytest.MonkeyPatch
+):
+    """同一群并发的缓存未命中只回源一次"""
+    group_id = "910001"
+    calls = 0
+    release = asyncio.Event()
+
+    async def fake_fetch(gid: str) -> dict[str, str]:
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return {"甲": "1"}
+
+    monkeypatch.setattr(un_nickname_mod, "fetch_nickname_to_user_map", fake_fetch)
+
+    tasks = [
+        asyncio.create_task(un_nickname_mod._get_cached_nickname_map(group_id)) for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    assert group_id in un_nickname_mod._inflight_loads
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert calls == 1
+    assert all(mapping == {"甲": "1"} for mapping, _ in results)
+    assert group_id not in un_nickname_mod._inflight_loads
+
+
+async def test_failed_load_propagates_and_clears_inflight(
+    un_nickname_mod, monkeypatch: pytest.MonkeyPatch
+):
+    """回源失败时所有等待方收到异常，进行中记录被清除，下次调用重新回源"""
+    group_id = "910002"
+    release = asyncio.Event()
+
+    async def failing_fetch(gid: str) -> dict[str, str]:
+        await release.wait()
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(un_nickname_mod, "fetch_nickname_to_user_map", failing_fetch)
+
+    tasks = [
+        asyncio.create_task(un_nickname_mod._get_cached_nickname_map(group_id)) for _ in range(2)
+    ]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert group_id not in un_nickname_mod._inflight_loads
+
+    async def working_fetch(gid: str) -> dict[str, str]:
+        return {"乙": "2"}
+
+    monkeypatch.setattr(un_nickname_mod, "fetch_nickname_to_user_map", working_fetch)
+    mapping, _ = await un_nickname_mod._get_cached_nickname_map(group_id)
+    assert mapping == {"乙": "2"}
+
+
+async def test_cancelled_load_clears_inflight(un_nickname_mod, monkeypatch: pytest.MonkeyPatch):
+    """回源方被取消时等待方同样被取消，进行中记录被清除"""
+    group_id = "910003"
+
+    async def hanging_fetch(gid: str) -> dict[str, str]:
+        await asyncio.Event().wait()
+        return {}
+
+    monkeypatch.setattr(un_nickname_mod, "fetch_nickname_to_user_map", hanging_fetch)
+
+    loader = asyncio.create_task(un_nickname_mod._get_cached_nickname_map(group_id))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(un_nickname_mod._get_cached_nickname_map(group_id))
+    await asyncio.sleep(0)
+
+    loader.cancel()
+    results = await asyncio.gather(loader, waiter, return_exceptions=True)
+
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+    assert group_id not in un_nickname_mod._inflight_loads
+
+
+async def test_add_nickname_record_insert_and_conflict(nickname_storage):
+    """新昵称绑定成功；已被绑定时返回持有者 QQ 号"""
+    module = nickname_storage
+    group_id = "920001"
+
+    assert await module.add_nickname_record(group_id, "1001", "甲") is None
+    assert await module.fetch_nickname_to_user_map(group_id) == {"甲": "1001"}
+
+    assert await module.add_nickname_record(group_id, "1001", "甲") == "1001"
+    assert await module.add_nickname_record(group_id, "1002", "甲") == "1001"
+    assert await module.fetch_nickname_to_user_map(group_id) == {"甲": "1001"}
+
+
+async def test_add_nickname_record_invalidates_cache(nickname_storage):
+    """绑定成功后缓存立即反映新昵称"""
+    module = nickname_storage
+    group_id = "920002"
+
+    mapping, _ = await module._get_cached_nickname_map(group_id)
+    assert mapping == {}
+
+    await module.add_nickname_record(group_id, "1001", "甲")
+    mapping, automaton = await module._get_cached_nickname_map(group_id)
+    assert mapping == {"甲": "1001"}
+    assert automaton is not None
+
+
+async def test_add_nickname_record_retries_when_conflict_vanishes(
+    nickname_storage, monkeypatch: pytest.MonkeyPatch
+):
+    """冲突记录在插入与查询之间被删除时重新插入"""
+    module = nickname_storage
+    group_id = "920003"
+    await module.add_nickname_record(group_id, "1001", "甲")
+
+    real_fetch_one = module.db.fetch_one
+
+    async def fetch_one(sql, params=None):
+        if sql == module._SQL_SELECT_NICKNAME_OWNER:
+            # 模拟持有者在两条语句之间删除了昵称
+            await module.db.execute(module._SQL_DELETE_NICKNAME, (group_id, "1001", "甲"))
+        return await real_fetch_one(sql, params)
+
+    monkeypatch.setattr(module.db, "fetch_one", fetch_one)
+
+    assert await module.add_nickname_record(group_id, "1002", "甲") is None
+    monkeypatch.undo()
+    assert await module.fetch_nickname_to_user_map(group_id) == {"甲": "1002"}
+
+
+async def test_add_nickname_record_gives_up_after_repeated_races(
+    nickname_storage, monkeypatch: pytest.MonkeyPatch
+):
+    """冲突记录反复消失时放弃并返回 NICKNAME_CONFLICT_RETRY"""
+    module = nickname_storage
+    group_id = "920004"
+    real_fetch_one = module.db.fetch_one
+    inserts = 0
+
+    async def fetch_one(sql, params=None):
+        nonlocal inserts
+        if sql == module._SQL_INSERT_NICKNAME:
+            inserts += 1
+            return None
+        if sql == module._SQL_SELECT_NICKNAME_OWNER:
+            return None
+        return await real_fetch_one(sql, params)
+
+    monkeypatch.setattr(module.db, "fetch_one", fetch_one)
+
+    result = await module.add_nickname_record(group_id, "1001", "甲")
+    assert result == module.NICKNAME_CONFLICT_RETRY
+    assert inserts == module.ADD_NICKNAME_ATTEMPTS
+
+
+async def test_delete_single_nickname(nickname_storage):
+    """删除存在的昵称返回 True，再次删除返回 False"""
+    module = nickname_storage
+    group_id = "920005"
+    await module.add_nickname_record(group_id, "1001", "甲")
+
+    assert await module.delete_single_nickname(group_id, "1001", "甲")
+    assert not await module.delete_single_nickname(group_id, "1001", "甲")
+    mapping, _ = await module._get_cached_nickname_map(group_id)
+    assert mapping == {}
+
+
+async def test_clear_user_nicknames_returns_sorted_and_invalidates(nickname_storage):
+    """清空只影响指定用户，返回排序后的昵称并清除缓存"""
+    module = nickname_storage
+    group_id = "920006"
+    for nickname in ("丙", "甲", "乙"):
+        await module.add_nickname_record(group_id, "1001", nickname)
+    await module.add_nickname_record(group_id, "1002", "丁")
+    await module._get_cached_nickname_map(group_id)
+
+    assert await module.clear_user_nicknames(group_id, "1001") == sorted(["丙", "甲", "乙"])
+    assert await module.clear_user_nicknames(group_id, "1001") == []
+    mapping, _ = await module._get_cached_nickname_map(group_id)
+    assert mapping == {"丁": "1002"}
+
+
+async def test_delete_nicknames_from_data_single_statement(nickname_storage):
+    """去重后一次删除，按输入顺序返回成功与不存在的昵称"""
+    module = nickname_storage
+    group_id = "920007"
+    for nickname in ("甲", "乙"):
+        await module.add_nickname_record(group_id, "1001", nickname)
+    await module.add_nickname_record(group_id, "1002", "丙")
+
+    success, not_found = await module.delete_nicknames_from_data(
+        group_id, "1001", ["乙", "丙", "乙", "甲", "丁"]
+    )
+
+    assert success == ["乙", "甲"]
+    assert not_found == ["丙", "丁"]
+    assert await module.fetch_nickname_to_user_map(group_id) == {"丙": "1002"}
+
+
+async def test_delete_nicknames_from_data_batched(
+    nickname_storage, monkeypatch: pytest.MonkeyPatch
+):
+    """超过单批上限时分批删除，结果与单条语句一致"""
+    module = nickname_storage
+    group_id = "920008"
+    nicknames = ["甲", "乙", "丙", "丁", "戊"]
+    for nickname in nicknames[:4]:
+        await module.add_nickname_record(group_id, "1001", nickname)
+    await module._get_cached_nickname_map(group_id)
+    monkeypatch.setattr(module, "MAX_DELETE_BATCH", 2)
+
+    success, not_found = await module.delete_nicknames_from_data(group_id, "1001", nicknames)
+
+    assert success == nicknames[:4]
+    assert not_found == ["戊"]
+    mapping, _ = await module._get_cached_nickname_map(group_id)
+    assert mapping == {}
+
+
+async def test_migrate_nickname_unique_index_removes_duplicates(nickname_storage):
+    """旧库中的重复绑定保留最早一条后建立唯一索引，再次执行不做任何修改"""
+    module = nickname_storage
+    db = module.db
+    group_id = "920009"
+
+    await db.execute(f"DROP INDEX {module.NICKNAME_UNIQUE_INDEX}")
+    await db.execute("CREATE INDEX idx_nicknames_group_nickname ON nicknames (group_id, nickname)")
+    insert = "INSERT INTO nicknames (group_id, user_id, nickname) VALUES (?, ?, ?)"
+    for user_id in ("1001", "1002", "1003"):
+        await db.execute(insert, (group_id, user_id, "甲"))
+    await db.execute(insert, (group_id, "1002", "乙"))
+
+    await module.migrate_nickname_unique_index()
+
+    assert await module.fetch_nickname_to_user_map(group_id) == {"甲": "1001", "乙": "1002"}
+    assert await db.fetch_one(module._SQL_INDEX_EXISTS, (module.NICKNAME_UNIQUE_INDEX,))
+    assert not await db.fetch_one(module._SQL_INDEX_EXISTS, ("idx_nicknames_group_nickname",))
+    assert await module.add_nickname_record(group_id, "1003", "甲") == "1001"
+
+    await module.migrate_nickname_unique_index()
+    assert await module.fetch_nickname_to_user_map(group_id) == {"甲": "1001", "乙": "1002"}
+
+
+async def test_init_nickname_storage_is_idempotent(nickname_storage):
+    """启动钩子可重复执行，唯一索引保持存在"""
+    module = nickname_storage
+
+    await module.init_nickname_storage()
+
+    assert await module.db.fetch_one(module._SQL_INDEX_EXISTS, (module.NICKNAME_UNIQUE_INDEX,))
+
+
+async def test_warm_up_nickname_cache_fills_cache(nickname_storage):
+    """预热一次加载所有群的昵称映射到缓存"""
+    module = nickname_storage
+    group_id = "920010"
+    insert = "INSERT INTO nicknames (group_id, user_id, nickname) VALUES (?, ?, ?)"
+    await module.db.execute(insert, (group_id, "1001", "甲"))
+    await module.db.execute(insert, (group_id, "1002", "乙"))
+    assert module._nickname_cache.peek(group_id) is None
+
+    await module.warm_up_nickname_cache()
+
+    entry = module._nickname_cache.peek(group_id)
+    assert entry is not None
+    assert entry[1] == {"甲": "1001", "乙": "1002"}
+    assert module.contains_any_nickname(entry[2], "at甲")
+
+
+async def test_warm_up_prefers_groups_with_most_nicknames(
+    nickname_storage, monkeypatch: pytest.MonkeyPatch
+):
+    """容量不足时优先预热昵称数最多的群"""
+    module = nickname_storage
+    insert = "INSERT INTO nicknames (group_id, user_id, nickname) VALUES (?, ?, ?)"
+    for index in range(20):
+        await module.db.execute(insert, ("920011", "1001", f"昵称{index}"))
+    await module.db.execute(insert, ("920012", "1001", "甲"))
+
+    cache = module._NickCache(4)
+    monkeypatch.setattr(module, "_nickname_cache", cache)
+    monkeypatch.setattr(module, "CACHE_MAXSIZE", 1)
+
+    await module.warm_up_nickname_cache()
+
+    entry = cache.peek("920011")
+    assert entry is not None
+    assert len(entry[1]) == 20
+    assert cache.peek("920012") is None
+    assert cache.cache_info().currsize == 1